@@ -2,6 +2,11 @@
     Distributor module.
     This module is a branch point in a recursively instantiated tree. 
     This module will pass data and signals up and down the tree.
+
+    Settings on their way down are held in a buffer of BUFFER_DEPTH settings. With BUFFER_DEPTH = 1, a node can take a new setting
+    at most every other cycle, as it has to hand its setting to a child before it is seen as idle again. With a deeper buffer a node
+    is idle as long as the buffer is not full, so it can take a new setting every cycle while it starts its children from the head
+    of the buffer, and up to one new setting per cycle reaches the leaves no matter how deep the tree is.
 */
 `timescale 1ns / 1ps
 module distributor  #(  parameter SHIFTREG_WIDTH = 10, 
@@ -9,7 +14,9 @@ module distributor  #(  parameter SHIFTREG_WIDTH = 10,
                         parameter NUM_NLIN_IDX = 2,
                         parameter SETTING_WIDTH = SHIFTREG_WIDTH-1 + (NUM_NLIN * NUM_NLIN_IDX)*$clog2(SHIFTREG_WIDTH-1),
                         parameter NUM_LEAVES = 10,
-                        parameter BRANCHES_PER_LEVEL = 3
+                        parameter BRANCHES_PER_LEVEL = 3,
+                        parameter STEPS_PER_CLK = 1,
+                        parameter BUFFER_DEPTH = 1
                         )(
                         input wire clk, 
                         input wire start,
@@ -25,10 +32,17 @@ module distributor  #(  parameter SHIFTREG_WIDTH = 10,
     localparam real LARGEST_SUBBRANCH = (LEVELS_NEEDED == 0) ? NUM_LEAVES : $pow(BRANCHES_PER_LEVEL, LEVELS_NEEDED-1);
     localparam integer BRANCHES_THIS_LEVEL = NUM_LEAVES <= BRANCHES_PER_LEVEL ? NUM_LEAVES : $rtoi($ceil(NUM_LEAVES/LARGEST_SUBBRANCH));
     
-    reg [SETTING_WIDTH-1:0] setting_reg = 0;
-    reg setting_valid = 0;
+    localparam PTR_WIDTH = BUFFER_DEPTH > 1 ? $clog2(BUFFER_DEPTH) : 1;
+
+    // The buffer for settings going down the tree. setting_reg is the head of the buffer
+    reg [SETTING_WIDTH-1:0] buffer[BUFFER_DEPTH-1:0];
+    reg [PTR_WIDTH-1:0] rd_ptr = 0;
+    reg [PTR_WIDTH-1:0] wr_ptr = 0;
+    reg [$clog2(BUFFER_DEPTH+1)-1:0] buffer_count = 0;
+    wire [SETTING_WIDTH-1:0] setting_reg = buffer[rd_ptr];
+    wire setting_valid = buffer_count != 0;
     reg setting_out_valid = 0;
-    assign idle = ~setting_valid;
+    assign idle = buffer_count != BUFFER_DEPTH;
     assign success = setting_out_valid;
 
     // Children signals
@@ -43,8 +57,10 @@ module distributor  #(  parameter SHIFTREG_WIDTH = 10,
     reg [BRANCHES_THIS_LEVEL-1:0] lowest_idle = 0;
     reg [BRANCHES_THIS_LEVEL-1:0] lowest_success = 0;
 
+    // idle_children lags one cycle behind, so a child that is started now can not be picked again in the next cycle
+    assign can_start = idle_children & ~start_children;
     always @(posedge clk) begin
-        lowest_idle <= idle_children & (~idle_children + 1); // A trick to get the lowest set bit. Infers an adder.
+        lowest_idle <= can_start & (~can_start + 1); // A trick to get the lowest set bit. Infers an adder.
         lowest_success <= success_children & (~success_children + 1); 
     end
     assign start_children = setting_valid ? lowest_idle : 0;
@@ -79,13 +95,22 @@ module distributor  #(  parameter SHIFTREG_WIDTH = 10,
         running <= (|running_children) | (|success_children);
     end
 
+    // If a child is started, the head of the buffer is taken
+    integer k;
+    initial begin
+        for (k = 0; k < BUFFER_DEPTH; k = k + 1) begin
+            buffer[k] = 0;
+        end
+    end
     always @(posedge clk) begin
         if (start) begin
-            setting_reg <= setting_in;
-            setting_valid <= 1;
-        end else if (|start_children) begin // If a child is started, the buffer can no longer be taken. 
-            setting_valid <= 0;
+            buffer[wr_ptr] <= setting_in;
+            wr_ptr <= (wr_ptr == BUFFER_DEPTH-1) ? 0 : wr_ptr + 1;
+        end
+        if (|start_children) begin
+            rd_ptr <= (rd_ptr == BUFFER_DEPTH-1) ? 0 : rd_ptr + 1;
         end
+        buffer_count <= buffer_count + start - (|start_children);
     end 
 
     // Generate the tree using recursion
@@ -93,13 +118,13 @@ module distributor  #(  parameter SHIFTREG_WIDTH = 10,
     if (NUM_LEAVES <= BRANCHES_PER_LEVEL) begin
         assign running_children = ~idle_children;
         for (g = 0; g < NUM_LEAVES; g = g + 1) begin
-            nlfsr_tester #(.SHIFTREG_WIDTH(SHIFTREG_WIDTH), .SETTING_WIDTH(SETTING_WIDTH), .NUM_NLIN(NUM_NLIN), .NUM_NLIN_IDX(NUM_NLIN_IDX) ) 
+            nlfsr_tester #(.SHIFTREG_WIDTH(SHIFTREG_WIDTH), .SETTING_WIDTH(SETTING_WIDTH), .NUM_NLIN(NUM_NLIN), .NUM_NLIN_IDX(NUM_NLIN_IDX), .STEPS_PER_CLK(STEPS_PER_CLK) ) 
                 nlfsr_tester_inst(.clk(clk),.start(start_children[g]), .setting_rd_en(setting_rd_en_children[g]), .setting_in(setting_reg), .idle(idle_children[g]), .success(success_children[g]), .setting_out(children_setting_out[g]));
         end
     end else begin
         for (g = 0; g < BRANCHES_THIS_LEVEL; g = g + 1) begin
             localparam NT = NUM_LEAVES - g*LARGEST_SUBBRANCH > LARGEST_SUBBRANCH ? LARGEST_SUBBRANCH : NUM_LEAVES - g*LARGEST_SUBBRANCH;
-            distributor #(.NUM_LEAVES(NT), .BRANCHES_PER_LEVEL(BRANCHES_PER_LEVEL), .SHIFTREG_WIDTH(SHIFTREG_WIDTH), .SETTING_WIDTH(SETTING_WIDTH), .NUM_NLIN(NUM_NLIN), .NUM_NLIN_IDX(NUM_NLIN_IDX))
+            distributor #(.NUM_LEAVES(NT), .BRANCHES_PER_LEVEL(BRANCHES_PER_LEVEL), .SHIFTREG_WIDTH(SHIFTREG_WIDTH), .SETTING_WIDTH(SETTING_WIDTH), .NUM_NLIN(NUM_NLIN), .NUM_NLIN_IDX(NUM_NLIN_IDX), .STEPS_PER_CLK(STEPS_PER_CLK), .BUFFER_DEPTH(BUFFER_DEPTH))
                 distributor_inst(.clk(clk), .start(start_children[g]), .setting_rd_en(setting_rd_en_children[g]), .setting_in(setting_reg), .idle(idle_children[g]), .running(running_children[g]), .success(success_children[g]), .setting_out(children_setting_out[g]));
         end
     end
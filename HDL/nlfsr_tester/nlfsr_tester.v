@@ -12,12 +12,16 @@
             - the first n-1 bits gives us the linear terms x_1 + x_4
             - the nonlinear part consists of two taps, with indexes (1 + 2) and (1 + 6) meaning it is x_3 * x_7
             - the whole feedback function is x_0 + x_1 + x_4 + (x_3 * x_ 7)
+
+    STEPS_PER_CLK sets how many steps both shift registers take each clock cycle. The steps are unrolled, and the fail and success
+    conditions are checked for every intermediate step. This trades LUTs (and a longer critical path) for fewer cycles per candidate.
 */
 
 `timescale 1ns / 1ps
 module nlfsr_tester #(  parameter SHIFTREG_WIDTH = 10,
                         parameter NUM_NLIN = 1, 
                         parameter NUM_NLIN_IDX = 2,
+                        parameter STEPS_PER_CLK = 1,
                         parameter SETTING_WIDTH = SHIFTREG_WIDTH - 1 + (NUM_NLIN * NUM_NLIN_IDX) * $clog2(SHIFTREG_WIDTH - 1)
                         ) (
                         input wire clk,
@@ -45,48 +49,63 @@ module nlfsr_tester #(  parameter SHIFTREG_WIDTH = 10,
     
     wire [SHIFTREG_WIDTH-1:0] lin_fw = {setting[0 +:SHIFTREG_WIDTH-1], 1'b1}; // x_0 is hardcoded 
     wire [SHIFTREG_WIDTH-1:0] lin_bw = {1'b1, lin_fw[SHIFTREG_WIDTH-1:1]}; // linear part of reciprocal/backward feedback function
-    wire [SHIFTREG_WIDTH-2:0] sr_fw_upper = sr_fw[SHIFTREG_WIDTH-1:1]; // Just a helper
-
-    // Get the linear part of the feedback functions
-    wire fb_fw_lin =  (^(lin_fw & sr_fw));
-    wire fb_bw_lin =  (^(lin_bw & sr_bw));
 
-    // Get the nonlinear part of the feedback functions
-    reg fb_fw_nlin;
-    reg fb_bw_nlin;
+    // The unrolled steps. step_fw/step_bw go through the states of sr_fw/sr_bw, and hold the next states after the last step
+    reg [SHIFTREG_WIDTH-1:0] step_fw;
+    reg [SHIFTREG_WIDTH-1:0] step_bw;
+    reg [SHIFTREG_WIDTH-1:0] prev_fw;
+    reg [SHIFTREG_WIDTH-2:0] step_fw_upper; // Just a helper
+    reg [SHIFTREG_WIDTH-2:0] step_counter;
+    reg fb_fw;
+    reg fb_bw;
     reg [IDX_WIDTH-1:0] idx;
     reg tmp_fw;
     reg tmp_bw;
-    integer i, j;
+    reg stop; // A fail or success condition is met in one of the steps
+    reg step_success; // The first condition met is the end of the counter with equal shift registers
+    reg fw_thrownbit = 0;
+    integer i, j, s;
     always @(*) begin
-        fb_fw_nlin = 0;
-        fb_bw_nlin = 0;
-        for (i = 0; i < NUM_NLIN; i = i + 1) begin
-            tmp_fw = 1'b1;
-            tmp_bw = 1'b1;
-            for (j = 0; j < NUM_NLIN_IDX; j = j + 1) begin
-                idx = setting[SHIFTREG_WIDTH-1 + IDX_WIDTH*(i*NUM_NLIN_IDX+j) +:IDX_WIDTH];
-                tmp_fw = tmp_fw & sr_fw_upper[idx];
-                tmp_bw = tmp_bw & sr_bw[idx];
-            end
-            fb_fw_nlin = fb_fw_nlin ^ tmp_fw;
-            fb_bw_nlin = fb_bw_nlin ^ tmp_bw;
-        end
-    end
+        step_fw = sr_fw;
+        step_bw = sr_bw;
+        prev_fw = {sr_fw[SHIFTREG_WIDTH-2:0], fw_thrownbit};
+        stop = 0;
+        step_success = 0;
+        for (s = 0; s < STEPS_PER_CLK; s = s + 1) begin
+            step_fw_upper = step_fw[SHIFTREG_WIDTH-1:1];
+            step_counter = counter + s;
 
-    wire fb_fw = fb_fw_lin ^ fb_fw_nlin;
-    wire fb_bw = fb_bw_lin ^ fb_bw_nlin;
+            // Fail or success conditions, only the first step where one is met counts
+            // Two equality checks, one detects odd and one detects even cycles. We are done at ..11111
+            if (~stop) begin
+                step_success = (step_fw == step_bw) & (&step_counter);
+                stop = (step_fw == step_bw) | (prev_fw == step_bw) | (&step_counter);
+            end
 
-    reg fw_thrownbit = 0;
-    wire [SHIFTREG_WIDTH-1:0] prev_fw = {sr_fw[SHIFTREG_WIDTH-2:0], fw_thrownbit};
+            // Get the linear part of the feedback functions
+            fb_fw = ^(lin_fw & step_fw);
+            fb_bw = ^(lin_bw & step_bw);
+            // Get the nonlinear part of the feedback functions
+            for (i = 0; i < NUM_NLIN; i = i + 1) begin
+                tmp_fw = 1'b1;
+                tmp_bw = 1'b1;
+                for (j = 0; j < NUM_NLIN_IDX; j = j + 1) begin
+                    idx = setting[SHIFTREG_WIDTH-1 + IDX_WIDTH*(i*NUM_NLIN_IDX+j) +:IDX_WIDTH];
+                    tmp_fw = tmp_fw & step_fw_upper[idx];
+                    tmp_bw = tmp_bw & step_bw[idx];
+                end
+                fb_fw = fb_fw ^ tmp_fw;
+                fb_bw = fb_bw ^ tmp_bw;
+            end
 
-    // Fail or success conditions
-    wire counter_done = &counter; // We are done at ..11111
-    wire shiftregs_equal = (sr_fw == sr_bw); // Two equality checks, one detects odd and one detects even cycles
-    wire missed_equal = (prev_fw == sr_bw); 
+            prev_fw = step_fw;
+            step_fw = {fb_fw, step_fw[SHIFTREG_WIDTH-1:1]};
+            step_bw = {step_bw[SHIFTREG_WIDTH-2:0], fb_bw};
+        end
+    end
 
     always @(posedge clk) begin
-        if (counter_done & shiftregs_equal) begin
+        if (running & step_success) begin
             success <= 1;
         end else if (start | setting_rd_en) begin
             success <= 0;
@@ -101,11 +120,11 @@ module nlfsr_tester #(  parameter SHIFTREG_WIDTH = 10,
             counter <= 0;
             fw_thrownbit <= 0;
         end else if (running) begin
-            sr_fw <= {fb_fw, sr_fw[SHIFTREG_WIDTH-1:1]};
-            sr_bw <= {sr_bw[SHIFTREG_WIDTH-2:0], fb_bw};
-            fw_thrownbit <= sr_fw[0];
-            running <= ~(shiftregs_equal | missed_equal | counter_done);
-            counter <= counter + 1;
+            sr_fw <= step_fw;
+            sr_bw <= step_bw;
+            fw_thrownbit <= prev_fw[0]; // The bit shifted out in the last step
+            running <= ~stop;
+            counter <= counter + STEPS_PER_CLK;
         end
     end
 endmodule
\ No newline at end of file
@@ -10,6 +10,9 @@ def pytest_addoption(parser):
     parser.addoption(
         "--num-nlin-idx", action="store", default="2", help="Sets parameter NUM_NLIN_IDX (defaults to 2)"
     )
+    parser.addoption(
+        "--steps-per-clk", action="store", default="1", help="Sets parameter STEPS_PER_CLK (defaults to 1)"
+    )
     parser.addoption(
         "--full", action="store_true", default=False, help="Run all tests"
     )
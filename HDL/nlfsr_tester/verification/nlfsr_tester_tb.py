@@ -1,13 +1,14 @@
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import ClockCycles, RisingEdge, First
+from cocotb.triggers import ClockCycles, RisingEdge, FallingEdge, ReadOnly, First
 import random
-import galois
 import math
 import sys
 # Get various helper functions from the python directory
 sys.path.append('../../../../software/')
-import nlfsr_utils
+import primitive_polys
+import dataset_needles
+import distributor_model
 
 
 def get_random(n, num_nlin, num_nlin_idx) -> int:
@@ -19,10 +20,14 @@ def get_random(n, num_nlin, num_nlin_idx) -> int:
     return rand_setting
 
 def get_known_good(n, num_nlin, num_nlin_idx) -> int:
-    # First, get a primitive polynomial and use it as the linear part of the feedback
-    pol = galois.primitive_poly(2, n, terms="min", method='random').coefficients(order='asc')
-    # pol is a list of ones and zeros, we convert it to an int discarding the first and last element
-    lin = int("".join([str(x) for x in pol[1:n]]), 2)
+    # Use a real maximum period NLFSR from the dataset if it has any of the forms this configuration can test
+    needle = dataset_needles.get_needle(n, num_nlin, num_nlin_idx)
+    if needle is not None:
+        return needle
+    # Otherwise, get a primitive polynomial from the precomputed table and use it as the linear part of the feedback
+    pol = primitive_polys.random_primitive_poly(n)
+    # Bit i of pol is the coefficient of x^i, we discard the first and last coefficient (x_0 is implicit in the FPGA format)
+    lin = (pol >> 1) & ((1 << (n-1)) - 1)
     # Now, get a "fake" non-linear part that does nothing
     clog2 = math.ceil(math.log(n-1, 2))
     nlin_part = 0
@@ -37,11 +42,10 @@ def get_known_good(n, num_nlin, num_nlin_idx) -> int:
     cand |= nlin_part << (n-1)
     return cand
 
-def is_max_period(cand, n, num_nlin, num_nlin_idx) -> bool:
-    lst = nlfsr_utils.format_fpga2list(cand, n, num_nlin, num_nlin_idx)
-    lin, nlins = nlfsr_utils.format_list2vec(lst)
-    period = nlfsr_utils.test_period(n, lin, nlins)
-    return period == ((1 << n) - 1)
+# True or False, or None if it is unknown (a wide candidate that is not in the dataset)
+def is_max_period(cand, n, num_nlin, num_nlin_idx):
+    # The dataset is the oracle, so wide registers can be checked quickly
+    return dataset_needles.is_max_period(cand, n, num_nlin, num_nlin_idx)
 
 # Basic test, useful for small tests and waveform debugging
 @cocotb.test()
@@ -94,7 +98,8 @@ async def needle_in_haystack(dut):
         assert (dut.idle.value == 0)
         await First(RisingEdge(dut.success), RisingEdge(dut.idle))
         expected_result = is_max_period(setting_in, n, num_nlin, num_nlin_idx)
-        assert (dut.success.value == expected_result)
+        if expected_result is not None:
+            assert (dut.success.value == expected_result)
         assert (dut.setting_out.value.integer == setting_in)
         if dut.success.value == 1:
             dut.setting_rd_en.value = 1
@@ -133,3 +138,42 @@ async def needles_only(dut):
             dut.setting_rd_en.value = 0
 
     await ClockCycles(dut.clk, 5)
+
+# Check that the tester runs for the expected number of cycles, which depends on STEPS_PER_CLK
+@cocotb.test()
+async def run_length(dut):
+    cocotb.start_soon(Clock(dut.clk, 1, units="ns").start())
+    n, num_nlin, num_nlin_idx = dut.SHIFTREG_WIDTH.value, dut.NUM_NLIN.value, dut.NUM_NLIN_IDX.value
+    steps_per_clk = dut.STEPS_PER_CLK.value
+    # Assign DUT inputs
+    dut.start.value = 0
+    dut.setting_rd_en.value = 0
+    dut.setting_in.value = 0
+    await RisingEdge(dut.clk)
+
+    haystack_size = 50
+    needle_idx = random.randint(0, haystack_size-1)
+    for i in range(haystack_size):
+        setting_in = get_known_good(n, num_nlin, num_nlin_idx) if i == needle_idx else get_random(n, num_nlin, num_nlin_idx)
+        expected_cycles, expected_success = distributor_model.tester_run_length(setting_in, n, num_nlin, num_nlin_idx, steps_per_clk=steps_per_clk)
+        dut.setting_in.value = setting_in
+        dut.start.value = 1
+        await RisingEdge(dut.clk)
+        dut.start.value = 0
+        # Count the rising edges until the tester has stopped
+        cycles = 0
+        while True:
+            await RisingEdge(dut.clk)
+            cycles += 1
+            await ReadOnly()
+            if dut.success.value == 1 or dut.idle.value == 1:
+                break
+        assert (cycles == expected_cycles)
+        assert (dut.success.value == expected_success)
+        await FallingEdge(dut.clk)
+        if dut.success.value == 1:
+            dut.setting_rd_en.value = 1
+            await RisingEdge(dut.clk)
+            dut.setting_rd_en.value = 0
+
+    await ClockCycles(dut.clk, 5)
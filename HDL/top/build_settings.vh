@@ -6,6 +6,8 @@
     `define NUM_NLIN_IDX 2
     `define NUM_TESTERS 50
     `define BRANCHES_PER_LEVEL 5
+    `define STEPS_PER_CLK 1
+    `define BUFFER_DEPTH 1
 
     `define REF_CLK_FREQ 200e6
     `define CLK_MULT 6
@@ -23,7 +23,7 @@ module genesys_top_wrapper (
     // Instantiate the top module
     localparam integer UART_CPB = (`REF_CLK_FREQ * `CLK_MULT /(`UART_BAUD * `SLOW_CLK_DIV));
 
-    nlfsr_top #(.SHIFTREG_WIDTH(`SHIFTREG_WIDTH), .NUM_NLIN(`NUM_NLIN), .NUM_NLIN_IDX(`NUM_NLIN_IDX), .NUM_TESTERS(`NUM_TESTERS), .BRANCHES_PER_LEVEL(`BRANCHES_PER_LEVEL), .UART_CPB(UART_CPB))
+    nlfsr_top #(.SHIFTREG_WIDTH(`SHIFTREG_WIDTH), .NUM_NLIN(`NUM_NLIN), .NUM_NLIN_IDX(`NUM_NLIN_IDX), .NUM_TESTERS(`NUM_TESTERS), .BRANCHES_PER_LEVEL(`BRANCHES_PER_LEVEL), .STEPS_PER_CLK(`STEPS_PER_CLK), .BUFFER_DEPTH(`BUFFER_DEPTH), .UART_CPB(UART_CPB))
         top_inst (.clk_fast(clk_fast), .clk_slow(clk_slow), .reset(reset), .uart_rx_in(top_uart_rx), .uart_tx_out(top_uart_tx));
 
     // Generate clocks based on the 200MHz differential clock on the board
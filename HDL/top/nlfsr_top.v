@@ -10,6 +10,8 @@ module nlfsr_top #( parameter SHIFTREG_WIDTH = 10,
                     parameter NUM_NLIN_IDX = 2,
                     parameter NUM_TESTERS = 10,
                     parameter BRANCHES_PER_LEVEL = 5,
+                    parameter STEPS_PER_CLK = 1,
+                    parameter BUFFER_DEPTH = 1,
                     parameter UART_CPB = 8 // "Clocks per bit" - a frequency independent "baudrate"
                     )(
                     input wire clk_fast,
@@ -77,7 +79,7 @@ module nlfsr_top #( parameter SHIFTREG_WIDTH = 10,
     assign distributor_rd_en = ~fifo_out_full & distributor_success;
     assign fifo_in_rd_en = distributor_start; 
     
-    distributor #(.NUM_LEAVES(NUM_TESTERS), .BRANCHES_PER_LEVEL(BRANCHES_PER_LEVEL), .SHIFTREG_WIDTH(SHIFTREG_WIDTH), .SETTING_WIDTH(SETTING_WIDTH), .NUM_NLIN(NUM_NLIN), .NUM_NLIN_IDX(NUM_NLIN_IDX)) 
+    distributor #(.NUM_LEAVES(NUM_TESTERS), .BRANCHES_PER_LEVEL(BRANCHES_PER_LEVEL), .SHIFTREG_WIDTH(SHIFTREG_WIDTH), .SETTING_WIDTH(SETTING_WIDTH), .NUM_NLIN(NUM_NLIN), .NUM_NLIN_IDX(NUM_NLIN_IDX), .STEPS_PER_CLK(STEPS_PER_CLK), .BUFFER_DEPTH(BUFFER_DEPTH)) 
         distributor_inst (.clk(clk_fast), .start(distributor_start), .setting_rd_en(distributor_rd_en), .setting_in(fifo_in_dout), .setting_out(distributor_setting_out), .idle(distributor_idle), .running(distributor_running), .success(distributor_success)); 
     
     localparam FIFO_DEPTH = 4096; // These don't apply to simulation.
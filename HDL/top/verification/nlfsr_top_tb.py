@@ -3,11 +3,11 @@ from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, RisingEdge
 from cocotbext.uart import UartSource, UartSink 
 import random
-import galois
 import math
 import sys
 sys.path.append('../../../../software/')
-import nlfsr_utils
+import primitive_polys
+import dataset_needles
 
 CMD_RESET = 1
 CMD_READ_SETTING = 2
@@ -47,10 +47,14 @@ def get_random(n, num_nlin, num_nlin_idx) -> int:
     return rand_setting
 
 def get_known_good(n, num_nlin, num_nlin_idx) -> int:
-    # First, get a primitive polynomial and use it as the linear part of the feedback
-    pol = galois.primitive_poly(2, n, terms="min", method='random').coefficients(order='asc')
-    # pol is a list of ones and zeros, we convert it to an int discarding the first and last element
-    lin = int("".join([str(x) for x in pol[1:n]]), 2)
+    # Use a real maximum period NLFSR from the dataset if it has any of the forms this configuration can test
+    needle = dataset_needles.get_needle(n, num_nlin, num_nlin_idx)
+    if needle is not None:
+        return needle
+    # Otherwise, get a primitive polynomial from the precomputed table and use it as the linear part of the feedback
+    pol = primitive_polys.random_primitive_poly(n)
+    # Bit i of pol is the coefficient of x^i, we discard the first and last coefficient (x_0 is implicit in the FPGA format)
+    lin = (pol >> 1) & ((1 << (n-1)) - 1)
     # Now, get a "fake" non-linear part that does nothing
     clog2 = math.ceil(math.log(n-1, 2))
     nlin_part = 0
@@ -65,11 +69,10 @@ def get_known_good(n, num_nlin, num_nlin_idx) -> int:
     cand |= nlin_part << (n-1)
     return cand
 
-def is_max_period(cand, n, num_nlin, num_nlin_idx) -> bool:
-    lst = nlfsr_utils.format_fpga2list(cand, n, num_nlin, num_nlin_idx)
-    lin, nlins = nlfsr_utils.format_list2vec(lst)
-    period = nlfsr_utils.test_period(n, lin, nlins)
-    return period == ((1 << n) - 1)
+# True or False, or None if it is unknown (a wide candidate that is not in the dataset)
+def is_max_period(cand, n, num_nlin, num_nlin_idx):
+    # The dataset is the oracle, so wide registers can be checked quickly
+    return dataset_needles.is_max_period(cand, n, num_nlin, num_nlin_idx)
 
 
 async def reset_dut(reset_signal, clk_signal):
@@ -188,18 +191,22 @@ async def needle_in_haystack(dut):
 
         await RisingEdge(dut.clk_slow)
 
-    expected_outputs = [cand for cand in haystack if is_max_period(cand, n, num_nlin, num_nlin_idx)]
+    # Candidates with an unknown result may or may not be found
+    results = [is_max_period(cand, n, num_nlin, num_nlin_idx) for cand in haystack]
+    expected_outputs = [cand for cand, res in zip(haystack, results) if res is True]
+    unknown = [cand for cand, res in zip(haystack, results) if res is None]
     dut._log.info(f"Expected outputs: {expected_outputs}")
     dut._log.info(f"Found these candidates: {success_list}")
 
-    assert len(expected_outputs) == len(success_list), "Not all expected outputs were found"
+    found = [cand for cand in success_list if cand not in unknown]
+    assert len(expected_outputs) == len(found), "Not all expected outputs were found"
     for cand in expected_outputs:
-        assert cand in success_list, "Expected output not found"
+        assert cand in found, "Expected output not found"
     
     # Check that num_found and num_started have the correct values
     await write_uart_cmd(uart_source, CMD_READ_NUM_FOUND, uart_data_len)
     num_found = await read_uart_blocking(uart_sink, uart_data_len, dut.clk_slow, uart_timeout)
     await write_uart_cmd(uart_source, CMD_READ_NUM_STARTED, uart_data_len)
     num_started = await read_uart_blocking(uart_sink, uart_data_len, dut.clk_slow, uart_timeout)
-    assert num_found == len(expected_outputs), "num_found is not correct"
+    assert num_found == len(success_list), "num_found is not correct"
     assert num_started == size_haystack, "num_started is not correct"
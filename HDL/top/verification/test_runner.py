@@ -35,11 +35,15 @@ def test_runner(request):
     width = request.config.getoption("--width")
     num_nlin = request.config.getoption("--num-nlin")
     num_nlin_idx = request.config.getoption("--num-nlin-idx")
+    steps_per_clk = request.config.getoption("--steps-per-clk")
+    buffer_depth = request.config.getoption("--buffer-depth")
 
     parameters = {
         "SHIFTREG_WIDTH": width,
         "NUM_NLIN": num_nlin,
         "NUM_NLIN_IDX": num_nlin_idx,
+        "STEPS_PER_CLK": steps_per_clk,
+        "BUFFER_DEPTH": buffer_depth,
     }
     # Waves needs some work, the "waves" option in runner.test() is not functional for icarus
     plusargs = []
@@ -77,7 +81,9 @@ def test_runner(request):
     
     if request.config.getoption("--synth"):
         # "xcup" is UltraScale+ family
-        res = subprocess.run(['yosys', '-p', f'synth_xilinx -family xcup -top {top_level}', f'{" ".join(verilog_sources)}'], capture_output=True)
+        # Synthesize with the same parameters as the simulation
+        chparam = " ".join(f"-set {name} {value}" for name, value in parameters.items())
+        res = subprocess.run(['yosys', '-p', f'chparam {chparam} {top_level}; synth_xilinx -family xcup -top {top_level}', f'{" ".join(verilog_sources)}'], capture_output=True)
         output = res.stdout.decode('utf-8')
         # output contains lots of text, and then This line "2.26. Printing statistics.". We print everything after that line
         output = output[output.find("Printing statistics.") + len("Printing statistics."):]
@@ -2,6 +2,7 @@ import sys
 import json
 sys.path.append('../software/')
 import nlfsr_utils # "nlfsr_utils.py" contains various useful functions for interacting with the dataset.
+import period_backends # "period_backends.py" tests the period with the fastest available implementation.
 
 dataset = json.load(open("nlfsr_dataset.json"))
 
@@ -26,5 +27,5 @@ n = "16"
 form = "3,0,1"
 for f in dataset[n][form]["functions"]:
     lin, nlins = nlfsr_utils.format_list2vec(f)
-    period = nlfsr_utils.test_period(int(n), lin, nlins)
+    period = period_backends.period(int(n), lin, nlins)
     print(f"Period of {nlfsr_utils.format_list2tex(f)}: {period}")
@@ -0,0 +1,132 @@
+import mmap
+import multiprocessing
+import os
+import tempfile
+from collections import Counter
+import numpy as np
+import nlfsr_codegen
+import dp_verify
+
+# Analyze the full cycle structure of an NLFSR on the "vector" format, i.e. how many cycles there are and how long they are.
+# Every state is visited exactly once, and a packed bitset with one bit per state keeps track of which states have been seen.
+# The bitset is a memory mapped file, so widths up to 32 (512 MiB of bitset) are possible, and it is shared with worker processes.
+# The walk is split over the cores with the distinguished points from dp_verify: the workers walk from every distinguished point
+# to the next one, marking the states on the way, and the lengths of the cycles through distinguished points follow from the
+# chain graph. Only cycles without any distinguished point, which are short, are then walked in this process, found by scanning
+# the bitset for unvisited states with NumPy.
+# Concurrent workers can lose a mark when they update the same byte of the bitset at the same time. Such a state is found in the
+# scan, and since walking from it reaches a distinguished point before it comes back, it is just marked and not counted again.
+# The walk still costs one Python iteration per state, about 1 us, so a width 28 function takes about 4.5 min of CPU time in
+# total, divided by the number of cores.
+
+MAX_N = 32
+SCAN_WORDS = 1 << 16 # Number of 64-bit words of the bitset that are scanned at a time when looking for an unvisited state
+FULL_WORD = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Create a zeroed bitset with one bit per state. If path is given the bitset is backed by that file.
+def new_visited_bitmap(N: int, path: str = None) -> mmap.mmap:
+    assert (N <= MAX_N), f"The visited bitmap is limited to N <= {MAX_N}"
+    num_bytes = max(8, (1 << N) // 8) # At least one full 64-bit word
+    if path is None:
+        bitmap = mmap.mmap(-1, num_bytes)
+    else:
+        with open(path, "wb+") as f:
+            f.truncate(num_bytes)
+            bitmap = mmap.mmap(f.fileno(), num_bytes)
+    # If there are fewer than 64 states, mark the padding bits as visited so they are never picked as a starting point
+    num_states = 1 << N
+    for s in range(num_states, num_bytes * 8):
+        bitmap[s >> 3] |= 1 << (s & 7)
+    return bitmap
+
+# Find the lowest unvisited state, starting the search at 64-bit word "word_idx". Returns (state, word_idx) or (-1, -1) if all states are visited.
+# Everything before word_idx must already be visited, which lets the caller keep a scan pointer that only moves forward.
+def find_unvisited(words: np.ndarray, word_idx: int) -> tuple[int, int]:
+    while word_idx < len(words):
+        chunk = words[word_idx:word_idx + SCAN_WORDS]
+        not_full = np.flatnonzero(chunk != FULL_WORD)
+        if len(not_full) > 0:
+            word_idx += int(not_full[0])
+            w = int(words[word_idx])
+            bit = ((~w) & (w + 1)).bit_length() - 1 # Lowest zero bit
+            return word_idx * 64 + bit, word_idx
+        word_idx += len(chunk)
+    return -1, -1
+
+_visited = None # The bitset in a worker process
+
+def init_worker(path: str):
+    global _visited
+    with open(path, "r+b") as f:
+        _visited = memoryview(mmap.mmap(f.fileno(), 0))
+
+# Pool worker: walk from the seeds (k << dp_bits) for k in [first, last) to the next distinguished point, marking the states.
+# Returns a list of (seed, next distinguished point, number of steps)
+def walk_mark_segments(args: tuple) -> list:
+    N, lin, nlins, dp_bits, first, last = args
+    dp_mask = (1 << dp_bits) - 1
+    kernels = nlfsr_codegen.get_kernels(N, lin, tuple(nlins))
+    segments = []
+    for k in range(first, last):
+        seed = k << dp_bits
+        state, steps = kernels.walk_mark_to_dp(seed, dp_mask, _visited)
+        segments.append((seed, state, steps))
+    return segments
+
+# Walk every state of the NLFSR once and return the multiset of cycle lengths as a Counter {cycle length: number of cycles}.
+# The all-zero state is a fixed point, so a maximum period NLFSR gives Counter({2^N - 1: 1, 1: 1}).
+# If path is given the bitset is stored in that file, otherwise in a temporary file. The file is removed afterwards
+def get_cycle_structure(N: int, lin: int, nlins: list, path: str = None, processes: int = None, dp_bits: int = None) -> Counter:
+    # The state graph is only a set of disjoint cycles if the feedback function is invertible
+    assert (lin & 1) and all((nl & 1) == 0 for nl in nlins), "x_0 must be a linear term and not part of any nonlinear term"
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".bitmap")
+        os.close(fd)
+    if dp_bits is None:
+        dp_bits = dp_verify.get_dp_bits(N)
+    dp_mask = (1 << dp_bits) - 1
+    kernels = nlfsr_codegen.get_kernels(N, lin, tuple(nlins))
+    bitmap = new_visited_bitmap(N, path)
+    visited = memoryview(bitmap)
+    words = np.frombuffer(bitmap, dtype=np.uint64)
+    cycles = Counter({1: 1}) # The all-zero state
+    visited[0] |= 1
+    try:
+        # The cycles through the nonzero distinguished points, walked in parallel
+        num_points = 1 << (N - dp_bits)
+        tasks = [(N, lin, nlins, dp_bits, first, min(first + dp_verify.SEEDS_PER_TASK, num_points)) for first in range(1, num_points, dp_verify.SEEDS_PER_TASK)]
+        chain = {}
+        with multiprocessing.Pool(processes or os.cpu_count(), initializer=init_worker, initargs=(path,)) as pool:
+            for segments in pool.imap_unordered(walk_mark_segments, tasks):
+                for seed, nxt, steps in segments:
+                    chain[seed] = (nxt, steps)
+        seen = set()
+        for point in chain:
+            if point in seen:
+                continue
+            length = 0
+            p = point
+            while p not in seen:
+                seen.add(p)
+                p, steps = chain[p]
+                length += steps
+            cycles[length] += 1
+
+        # The cycles without distinguished points, and states where a mark was lost
+        word_idx = 0
+        while True:
+            start, word_idx = find_unvisited(words, word_idx)
+            if start < 0:
+                break
+            length = 0 if (start & dp_mask) == 0 else kernels.cycle_without_dp(start, dp_mask)
+            if length > 0:
+                kernels.walk_mark(start, visited)
+                cycles[length] += 1
+            else:
+                visited[start >> 3] |= 1 << (start & 7)
+    finally:
+        del words
+        visited.release()
+        bitmap.close()
+        os.remove(path)
+    return cycles
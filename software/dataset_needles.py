@@ -0,0 +1,70 @@
+import json
+import os
+import random
+from functools import lru_cache
+import nlfsr_utils
+import nlfsr_codegen
+import primitive_polys
+
+# Known good candidates ("needles") for the testbenches, taken from the dataset, and an oracle for the expected result of a candidate.
+# A configuration with NUM_NLIN nonlinear terms of NUM_NLIN_IDX taps covers the dataset forms "k,0,...,0,NUM_NLIN", e.g. "k,1" for
+# NUM_NLIN = 1 and NUM_NLIN_IDX = 2. The functions of these forms, and their reciprocals, are encoded on the FPGA format.
+# Membership in the dataset is used as the oracle, which also works for wide registers where the period can not be tested in Python.
+# The dataset is far from complete for wide registers, so there the oracle can only say that a candidate is unknown.
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "nlfsr_dataset.json")
+TEST_PERIOD_N_LIMIT = 25 # Candidates that are not in the dataset are tested directly below this width
+
+@lru_cache(maxsize=1)
+def get_dataset(path: str = DATASET_FILE) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+# The dataset form with num_nlin nonlinear terms of degree num_nlin_idx and num_lin linear terms
+def get_fpga_form(num_lin: int, num_nlin: int, num_nlin_idx: int) -> str:
+    return ",".join([str(num_lin)] + ["0"] * (num_nlin_idx - 2) + [str(num_nlin)])
+
+# All the dataset forms that can be tested with the configuration
+def get_fpga_forms(n: int, num_nlin: int, num_nlin_idx: int, dataset_path: str = DATASET_FILE) -> list:
+    forms = get_dataset(dataset_path).get(str(n), {})
+    return [form for form in forms if form == get_fpga_form(int(form.split(",")[0]), num_nlin, num_nlin_idx)]
+
+# Settings on the FPGA format for every function of the forms that the configuration can test, and their reciprocals
+@lru_cache(maxsize=16)
+def get_needles(n: int, num_nlin: int, num_nlin_idx: int, dataset_path: str = DATASET_FILE) -> tuple:
+    dataset = get_dataset(dataset_path)
+    needles = set()
+    for form in get_fpga_forms(n, num_nlin, num_nlin_idx, dataset_path):
+        for fn in dataset[str(n)][form]["functions"]:
+            for lst in (fn, nlfsr_utils.get_reciprocal(n, fn)):
+                # x_0 is not available as a tap in the nonlinear terms
+                if all(0 not in term for term in lst if len(term) > 1):
+                    needles.add(nlfsr_utils.format_list2fpga(n, lst))
+    return tuple(sorted(needles))
+
+# A random needle, or None if the dataset has no functions the configuration can test
+def get_needle(n: int, num_nlin: int, num_nlin_idx: int, dataset_path: str = DATASET_FILE):
+    needles = get_needles(n, num_nlin, num_nlin_idx, dataset_path)
+    return random.choice(needles) if len(needles) > 0 else None
+
+# The canonical (smallest lexicographic) forms of the dataset functions of width n
+@lru_cache(maxsize=16)
+def get_known(n: int, dataset_path: str = DATASET_FILE) -> frozenset:
+    forms = get_dataset(dataset_path).get(str(n), {})
+    return frozenset(json.dumps(nlfsr_utils.get_smallest_lex(n, fn)) for form in forms for fn in forms[form]["functions"])
+
+# The expected result of testing a setting on the FPGA format.
+# Purely linear functions (e.g. with x_k * x_k terms) are checked with the primitive polynomial test, and functions in the dataset
+# have maximum period. Other functions are tested directly below TEST_PERIOD_N_LIMIT. For wider ones the result is unknown and
+# None is returned, since a candidate that is not in the dataset may still be a new maximum period NLFSR.
+def is_max_period(setting: int, n: int, num_nlin: int, num_nlin_idx: int, dataset_path: str = DATASET_FILE):
+    lst = nlfsr_utils.reduce_function(nlfsr_utils.format_fpga2list(setting, n, num_nlin, num_nlin_idx))
+    lin, nlins = nlfsr_utils.format_list2vec(lst)
+    if len(nlins) == 0:
+        return primitive_polys.is_primitive_lfsr(n, lin)
+    if json.dumps(nlfsr_utils.get_smallest_lex(n, lst)) in get_known(n, dataset_path):
+        return True
+    if n < TEST_PERIOD_N_LIMIT:
+        return nlfsr_codegen.test_period(n, lin, nlins) == (1 << n) - 1
+    return None
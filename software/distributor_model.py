@@ -0,0 +1,272 @@
+import argparse
+import math
+import random
+import nlfsr_utils
+
+# A cycle accurate model of the distributor tree in HDL/distributor/distributor.v, for sizing NUM_TESTERS and BRANCHES_PER_LEVEL.
+# The model mirrors the registers of the distributor nodes (setting buffer, the registered lowest_idle/lowest_success picks,
+# the output register and the running flag) and of the testers, and is fed with run lengths: the number of cycles a tester is
+# running for a candidate. When nothing but the tester counters changes from one cycle to the next, the simulation jumps
+# straight to the next cycle where a tester finishes, so long running candidates are cheap to simulate.
+# Usage: python distributor_model.py --width <n> --num-nlin <k> --num-nlin-idx <d> --testers <t> [--branches <b> ...]
+
+# Mirror of nlfsr_tester.v. Returns (number of cycles the tester is running, success) for a setting on the FPGA format.
+# Random candidates for wide registers often run for a large fraction of 2^(n-1) cycles, so the walk can be capped with
+# max_cycles, in which case (max_cycles, False) is returned. steps_per_clk is the STEPS_PER_CLK parameter of the tester
+def tester_run_length(setting: int, n: int, num_nlin: int, num_nlin_idx: int, max_cycles: int = None, steps_per_clk: int = 1) -> tuple[int, bool]:
+    mask = (1 << n) - 1
+    idx_width = nlfsr_utils.get_idx_width(n)
+    lin_fw = ((setting & ((1 << (n - 1)) - 1)) << 1) | 1 # x_0 is hardcoded
+    lin_bw = (1 << (n - 1)) | (lin_fw >> 1)
+    nlins_fw, nlins_bw = [], []
+    for i in range(num_nlin):
+        m_fw, m_bw = 0, 0
+        for j in range(num_nlin_idx):
+            idx = (setting >> (n - 1 + idx_width * (i * num_nlin_idx + j))) & ((1 << idx_width) - 1)
+            m_fw |= 1 << (idx + 1) # sr_fw_upper[idx]
+            m_bw |= 1 << idx
+        nlins_fw.append(m_fw)
+        nlins_bw.append(m_bw)
+    fw, bw = 1 << (n - 1), 1 # INIT_VAL_FW and INIT_VAL_BW
+    prev_fw = 0 # {sr_fw[n-2:0], fw_thrownbit} right after start
+    counter_done = (1 << (n - 1)) - 1
+    counter = 0
+    steps = 0 # Number of steps where the conditions are checked
+    while True:
+        steps += 1
+        equal, missed_equal, done = fw == bw, prev_fw == bw, counter == counter_done
+        if equal or missed_equal or done:
+            return -(-steps // steps_per_clk), equal and done
+        if max_cycles is not None and steps == max_cycles * steps_per_clk:
+            return max_cycles, False
+        fb_fw = nlfsr_utils.parity(fw & lin_fw)
+        for m in nlins_fw:
+            fb_fw ^= (fw & m) == m
+        fb_bw = nlfsr_utils.parity(bw & lin_bw)
+        for m in nlins_bw:
+            fb_bw ^= (bw & m) == m
+        prev_fw = fw
+        fw = (fw >> 1) | (fb_fw << (n - 1))
+        bw = ((bw << 1) & mask) | fb_bw
+        counter += 1
+
+# Run lengths of random candidates, generated the same way as get_random in the testbenches
+def sample_run_lengths(n: int, num_nlin: int, num_nlin_idx: int, count: int, max_cycles: int = None, steps_per_clk: int = 1) -> list:
+    idx_width = nlfsr_utils.get_idx_width(n)
+    run_lengths = []
+    for _ in range(count):
+        setting = random.getrandbits(n - 1)
+        for i in range(num_nlin * num_nlin_idx):
+            setting |= random.randint(0, n - 2) << (n - 1 + idx_width * i)
+        run_lengths.append(tester_run_length(setting, n, num_nlin, num_nlin_idx, max_cycles, steps_per_clk))
+    return run_lengths
+
+class Tester:
+    def __init__(self):
+        self.running = False
+        self.success = False
+        self.remaining = 0 # Running cycles left, including the current one
+        self.will_succeed = False
+        self.setting = None
+
+    def idle(self) -> bool:
+        return not self.running and not self.success
+
+    def tick(self, start: bool, rd_en: bool, setting_in):
+        finishing = self.running and self.remaining == 1
+        if finishing and self.will_succeed:
+            self.success = True
+        elif start or rd_en:
+            self.success = False
+        if start:
+            self.running = True
+            self.setting = setting_in
+            self.remaining, self.will_succeed = setting_in[1], setting_in[2]
+        elif self.running:
+            self.running = not finishing
+            self.remaining -= 1
+
+class Distributor:
+    def __init__(self, num_leaves: int, branches_per_level: int, buffer_depth: int = 1):
+        # Same tree generation as distributor.v, including the use of real numbers
+        levels_needed = math.ceil(math.log10(num_leaves) / math.log10(branches_per_level))
+        largest_subbranch = num_leaves if levels_needed == 0 else branches_per_level ** (levels_needed - 1)
+        self.leaf_level = num_leaves <= branches_per_level
+        if self.leaf_level:
+            self.children = [Tester() for _ in range(num_leaves)]
+        else:
+            branches = math.ceil(num_leaves / largest_subbranch)
+            self.children = [Distributor(min(largest_subbranch, num_leaves - g * largest_subbranch), branches_per_level, buffer_depth) for g in range(branches)]
+        self.buffer_depth = buffer_depth
+        self.buffer = [] # The head of the buffer is the setting given to the children
+        self.lowest_idle = -1 # Index of the registered lowest set bit, -1 if no bits are set
+        self.lowest_success = -1
+        self.setting_out = None
+        self.setting_out_valid = False
+        self.running = False
+
+    def idle(self) -> bool:
+        return len(self.buffer) < self.buffer_depth
+
+    # The registers that matter for timing, used to detect when the tree is in a steady state
+    def signature(self) -> tuple:
+        sig = (len(self.buffer), self.lowest_idle, self.lowest_success, self.setting_out_valid, self.running)
+        if self.leaf_level:
+            return sig + tuple((c.running, c.success) for c in self.children)
+        return sig + tuple(c.signature() for c in self.children)
+
+    # Number of levels of distributor nodes, including this one
+    def depth(self) -> int:
+        return 1 if self.leaf_level else 1 + max(c.depth() for c in self.children)
+
+    # A setting can take a cycle per level to reach a tester, and the running flags take a cycle per level to come back up, so
+    # the root can look done for up to 2 * depth cycles while a setting is still in the tree
+    def get_drain_cycles(self) -> int:
+        return 2 * self.depth() + 2
+
+    # True if a setting is anywhere in the subtree: in a buffer or output register, or in a tester that is running or holding a success
+    def busy(self) -> bool:
+        if len(self.buffer) > 0 or self.setting_out_valid:
+            return True
+        if self.leaf_level:
+            return any(c.running or c.success for c in self.children)
+        return any(c.busy() for c in self.children)
+
+    def testers(self) -> list:
+        if self.leaf_level:
+            return self.children
+        return [t for c in self.children for t in c.testers()]
+
+    def tick(self, start: bool, rd_en: bool, setting_in):
+        # Sample the outputs of the children before anything is updated
+        idle_children = [c.idle() for c in self.children]
+        if self.leaf_level:
+            success_children = [c.success for c in self.children]
+            running_children = [not i for i in idle_children]
+        else:
+            success_children = [c.setting_out_valid for c in self.children]
+            running_children = [c.running for c in self.children]
+        start_idx = self.lowest_idle if len(self.buffer) > 0 else -1
+        rd_idx = -1 if self.setting_out_valid else self.lowest_success
+        children_setting_in = self.buffer[0] if len(self.buffer) > 0 else None
+
+        # A child that is started now can not be picked in the next cycle
+        can_start = [idle and g != start_idx for g, idle in enumerate(idle_children)]
+        self.lowest_idle = can_start.index(True) if True in can_start else -1
+        self.lowest_success = success_children.index(True) if True in success_children else -1
+        if self.setting_out_valid:
+            if rd_en:
+                self.setting_out_valid = False
+        elif rd_idx >= 0:
+            self.setting_out_valid = True
+            self.setting_out = self.children[rd_idx].setting if self.leaf_level else self.children[rd_idx].setting_out
+        self.running = any(running_children) or any(success_children)
+        if start_idx >= 0:
+            self.buffer.pop(0)
+        if start:
+            self.buffer.append(setting_in)
+
+        for g, c in enumerate(self.children):
+            c.tick(g == start_idx, g == rd_idx, children_setting_in)
+
+# Simulate the tree with the root fed like in nlfsr_top.v: started whenever it is idle and there are candidates left, and results
+# read out as soon as they are available. candidates is a list of (run length, success).
+# Returns a dict with the number of cycles until the tree is done, the tester utilization and the results in the order they came out.
+# The cycles are counted from the first cycle where the root is started, until the first cycle where every candidate has been
+# started, the tree is empty (no setting in any buffer or output register, and no tester running or holding a success) and the
+# running output of the root is low. The running flag alone is not enough, since it only reflects the children and not the
+# settings still in the buffers. From the outside, the end is the first cycle of a run of get_drain_cycles() cycles where the root
+# is idle, not running and has no result, see model_check in distributor_tb.py.
+def simulate(num_testers: int, branches_per_level: int, candidates: list, buffer_depth: int = 1) -> dict:
+    root = Distributor(num_testers, branches_per_level, buffer_depth)
+    testers = root.testers()
+    queue = [(i, run_length, success) for i, (run_length, success) in enumerate(candidates)]
+    num_started = 0
+    results = []
+    busy = 0 # Sum over cycles of the number of running testers
+    cycle = 0
+    prev_sig = None
+    # Like the testbenches, let the registered picks settle before the first start
+    for _ in range(2):
+        root.tick(False, False, None)
+    while True:
+        start = root.idle() and num_started < len(queue)
+        rd_en = root.setting_out_valid
+        if not start and num_started == len(queue) and not root.busy() and not root.running:
+            break
+        if rd_en:
+            results.append(root.setting_out[0])
+        busy += sum(t.running for t in testers)
+        finishing = any(t.running and t.remaining == 1 for t in testers)
+        sig = root.signature()
+        root.tick(start, rd_en, queue[num_started] if start else None)
+        if start:
+            num_started += 1
+        cycle += 1
+        # If nothing changed and no tester finished, nothing will change until the next tester finishes
+        new_sig = root.signature()
+        if not start and not rd_en and not finishing and new_sig == sig == prev_sig:
+            running = [t for t in testers if t.running]
+            if len(running) > 0:
+                skip = min(t.remaining for t in running) - 1
+                for t in running:
+                    t.remaining -= skip
+                busy += skip * len(running)
+                cycle += skip
+        prev_sig = new_sig
+    return {
+        "cycles": cycle,
+        "utilization": busy / (cycle * num_testers) if cycle > 0 else 0.0,
+        "candidates_per_cycle": len(candidates) / cycle if cycle > 0 else 0.0,
+        "results": results,
+    }
+
+# Feed the root with candidates (cycling through the list) whenever it is idle for num_cycles cycles, and return the number of
+# times the root was started. Results are read out as soon as they are available. Used to measure the sustained dispatch rate
+def count_starts(num_testers: int, branches_per_level: int, candidates: list, num_cycles: int, buffer_depth: int = 1) -> int:
+    root = Distributor(num_testers, branches_per_level, buffer_depth)
+    for _ in range(2):
+        root.tick(False, False, None)
+    num_started = 0
+    for _ in range(num_cycles):
+        start = root.idle()
+        run_length, success = candidates[num_started % len(candidates)]
+        root.tick(start, root.setting_out_valid, (num_started, run_length, success) if start else None)
+        num_started += start
+    return num_started
+
+# Simulate every tree shape, and return (branches_per_level, result) for the one with the highest throughput
+def best_tree_shape(num_testers: int, candidates: list, branch_options=range(2, 11), buffer_depth: int = 1) -> tuple[int, dict]:
+    best = None
+    for b in branch_options:
+        res = simulate(num_testers, b, candidates, buffer_depth)
+        if best is None or res["candidates_per_cycle"] > best[1]["candidates_per_cycle"]:
+            best = (b, res)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict utilization of the distributor tree")
+    parser.add_argument("--width", type=int, default=32)
+    parser.add_argument("--num-nlin", type=int, default=1)
+    parser.add_argument("--num-nlin-idx", type=int, default=2)
+    parser.add_argument("--steps-per-clk", type=int, default=1, help="STEPS_PER_CLK of the testers")
+    parser.add_argument("--testers", type=int, nargs="+", default=[50])
+    parser.add_argument("--branches", type=int, nargs="+", default=list(range(2, 11)))
+    parser.add_argument("--buffer-depth", type=int, nargs="+", default=[1], help="BUFFER_DEPTH of the distributor nodes")
+    parser.add_argument("--samples", type=int, default=2000, help="Number of random candidates to measure run lengths for")
+    parser.add_argument("--max-run-length", type=int, default=1 << 16, help="Cap on the measured run lengths")
+    parser.add_argument("--run-lengths", default=None, help="File with measured run lengths, one per line, used instead of sampling")
+    args = parser.parse_args()
+
+    if args.run_lengths is not None:
+        with open(args.run_lengths) as f:
+            candidates = [(int(line), False) for line in f if line.strip()]
+    else:
+        candidates = sample_run_lengths(args.width, args.num_nlin, args.num_nlin_idx, args.samples, args.max_run_length, args.steps_per_clk)
+    mean = sum(r for r, _ in candidates) / len(candidates)
+    print(f"Mean run length of {len(candidates)} random candidates: {mean:.1f} cycles")
+    for t in args.testers:
+        for b in args.branches:
+            for d in args.buffer_depth:
+                res = simulate(t, b, candidates, d)
+                print(f"NUM_TESTERS={t:4d} BRANCHES_PER_LEVEL={b:2d} BUFFER_DEPTH={d:2d}: utilization {res['utilization']:.3f}, {res['candidates_per_cycle']:.3f} candidates per cycle")
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import nlfsr_codegen
+
+# Parallel verification of maximum period for wide NLFSRs on the "vector" format, using distinguished points.
+# A state is "distinguished" if its lowest dp_bits bits are zero. Every nonzero distinguished point is used as a seed, and the
+# workers walk from each seed until they reach the next distinguished point. This gives a chain graph where each distinguished
+# point points to the next one together with the number of steps between them.
+# Since the NLFSR is invertible, the state graph is a set of disjoint cycles, and the NLFSR has maximum period exactly when
+# following the chain from any distinguished point gets back to where it started after 2^N - 1 steps.
+# Every nonzero state is stepped through exactly once in total, spread over all the workers, and the memory needed is
+# proportional to the number of distinguished points, 2^(N - dp_bits).
+
+DEFAULT_MAX_POINTS = 1 << 20 # Upper bound on the number of distinguished points kept in memory
+MIN_DP_BITS = 12 # Segments of about 2^MIN_DP_BITS steps, so the walks and not the messages between processes dominate
+SEEDS_PER_TASK = 64 # Number of seeds handed to a worker at a time
+
+# Pick the number of dp_bits that keeps the number of distinguished points below max_points, with segments of a useful length
+def get_dp_bits(N: int, max_points: int = DEFAULT_MAX_POINTS, min_dp_bits: int = MIN_DP_BITS) -> int:
+    return min(N - 1, max(min_dp_bits, N - (max_points.bit_length() - 1)))
+
+# Walk from the seeds (k << dp_bits) for k in [first, last) to the next distinguished point.
+# Returns a list of (seed, next distinguished point, number of steps)
+def walk_segments(args: tuple) -> list:
+    N, lin, nlins, dp_bits, first, last = args
+    dp_mask = (1 << dp_bits) - 1
+    kernels = nlfsr_codegen.get_kernels(N, lin, tuple(nlins))
+    segments = []
+    for k in range(first, last):
+        seed = k << dp_bits
+        state, steps = kernels.walk_to_dp(seed, dp_mask)
+        segments.append((seed, state, steps))
+    return segments
+
+# Get the chain graph as a dict {distinguished point: (next distinguished point, steps)}
+def get_chain(N: int, lin: int, nlins: list, dp_bits: int, processes: int = None) -> dict:
+    # The chain graph only describes the cycles if the feedback function is invertible
+    assert (lin & 1) and all((nl & 1) == 0 for nl in nlins), "x_0 must be a linear term and not part of any nonlinear term"
+    assert (0 <= dp_bits < N), "dp_bits must be smaller than N"
+    num_points = 1 << (N - dp_bits)
+    # The all-zero state is a fixed point and not part of the maximum period cycle, so seeds start at k = 1
+    tasks = [(N, lin, nlins, dp_bits, first, min(first + SEEDS_PER_TASK, num_points)) for first in range(1, num_points, SEEDS_PER_TASK)]
+    chain = {}
+    with multiprocessing.Pool(processes or os.cpu_count()) as pool:
+        for segments in pool.imap_unordered(walk_segments, tasks):
+            for seed, nxt, steps in segments:
+                chain[seed] = (nxt, steps)
+    return chain
+
+# Test if the NLFSR has maximum period, spreading the work over all cores
+def is_max_period(N: int, lin: int, nlins: list, dp_bits: int = None, processes: int = None) -> bool:
+    if dp_bits is None:
+        dp_bits = get_dp_bits(N)
+    chain = get_chain(N, lin, nlins, dp_bits, processes)
+    start = 1 << dp_bits
+    point = start
+    period = 0
+    while True:
+        point, steps = chain[point]
+        period += steps
+        if point == start:
+            break
+    return period == (1 << N) - 1
@@ -0,0 +1,115 @@
+import argparse
+import json
+import multiprocessing
+import os
+import keystream
+
+# Linear complexity profiling of the NLFSRs in the dataset.
+# The Berlekamp-Massey algorithm works on packed bits: the connection polynomials and the window of the sequence are Python
+# integers, so the discrepancy is a popcount of an AND and the updates are whole-word XORs instead of loops over lists of bits.
+# The sequences come from keystream.keystream, and results are cached in a file next to the dataset, with one column per (n, form)
+# aligned with the list of functions. The linear complexity is only stored when it is exact (two full periods, N <= EXACT_N_LIMIT);
+# for wider registers only the largest deviation of the profile from the expected i/2 is stored.
+# Berlekamp-Massey still takes O(nbits * L) word operations, which is a couple of seconds per function for N = 16.
+# Usage: python linear_complexity.py --n <n> --form <form> [--nbits <nbits>] [--processes <p>]
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "nlfsr_dataset.json")
+RESULTS_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "nlfsr_linear_complexity.json")
+EXACT_N_LIMIT = 16 # Up to this width, two full periods are used so the linear complexity is exact
+DEFAULT_NBITS = 1 << 16 # Number of sequence bits used for wider registers
+
+# Run Berlekamp-Massey on the first nbits bits of seq (bytes-like, least significant bit first).
+# Returns (linear complexity, linear complexity profile), where the profile is the linear complexity after each bit
+def berlekamp_massey(seq, nbits: int) -> tuple[int, list]:
+    C, B = 1, 1 # Connection polynomials, bit k is the coefficient of x^k
+    L, m = 0, 1
+    R = 0 # The sequence so far, reversed: bit k is s_{i-k}
+    profile = []
+    i = 0
+    for byte in seq:
+        for b in range(8):
+            if i == nbits:
+                return L, profile
+            R = (R << 1) | ((byte >> b) & 1)
+            # Only the bits back to s_min(L, i - L) can be used by later steps (a length change reaches back to s_L), so R is
+            # truncated to that window. This is done when R has grown to twice the window, so the masking is amortized
+            window = max(L, i - L) + 1
+            if R.bit_length() > 2 * window:
+                R &= (1 << window) - 1
+            d = (C & R).bit_count() & 1 # The discrepancy
+            if d:
+                T = C
+                C ^= B << m
+                if 2 * L <= i:
+                    L, B, m = i + 1 - L, T, 1
+                else:
+                    m += 1
+            else:
+                m += 1
+            profile.append(L)
+            i += 1
+    return L, profile
+
+def get_nbits(N: int) -> int:
+    return 2 * ((1 << N) - 1) if N <= EXACT_N_LIMIT else DEFAULT_NBITS
+
+# Pool worker. Returns (linear complexity, largest deviation of the profile from the expected i/2)
+def profile_function(task: tuple) -> tuple[int, float]:
+    N, fn, nbits = task
+    seq = keystream.keystream(N, fn, 1, (nbits + 7) // 8)
+    L, profile = berlekamp_massey(seq, nbits)
+    deviation = max(abs(l - (i + 1) / 2) for i, l in enumerate(profile))
+    return L, deviation
+
+def load_results(path: str = RESULTS_FILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+# Compute the linear complexity of every function for (n, form) in parallel and store it in the results file.
+# Cached results are reused if they were computed with the same nbits for the same number of functions
+def profile_form(n: str, form: str, nbits: int = None, processes: int = None, dataset_path: str = DATASET_FILE, results_path: str = RESULTS_FILE) -> dict:
+    with open(dataset_path) as f:
+        functions = json.load(f)[n][form]["functions"]
+    if nbits is None:
+        nbits = get_nbits(int(n))
+    results = load_results(results_path)
+    cached = results.get(n, {}).get(form)
+    if cached is not None and cached["nbits"] == nbits and len(cached["max_profile_deviation"]) == len(functions):
+        return cached
+
+    tasks = [(int(n), fn, nbits) for fn in functions]
+    with multiprocessing.Pool(processes or os.cpu_count()) as pool:
+        profiled = pool.map(profile_function, tasks)
+    exact = nbits >= 2 * ((1 << int(n)) - 1)
+    column = {
+        "nbits": nbits,
+        "exact": exact,
+        "max_profile_deviation": [d for _, d in profiled],
+    }
+    # With fewer bits than two periods the linear complexity is just the saturated profile, about nbits/2, so it is not stored
+    if exact:
+        column["linear_complexity"] = [L for L, _ in profiled]
+    results.setdefault(n, {})[form] = column
+    tmp = results_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(results, f)
+    os.replace(tmp, results_path)
+    return column
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the linear complexity of the NLFSRs in the dataset")
+    parser.add_argument("--n", required=True, help="Register width")
+    parser.add_argument("--form", required=True, help="Form of the feedback functions, e.g. 7,0,1")
+    parser.add_argument("--nbits", type=int, default=None, help="Number of sequence bits to use")
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes (defaults to the number of cores)")
+    args = parser.parse_args()
+    column = profile_form(args.n, args.form, args.nbits, args.processes)
+    print(f"n={args.n}, form={args.form}, {column['nbits']} bits{' (exact)' if column['exact'] else ''}")
+    if column["exact"]:
+        lcs = column["linear_complexity"]
+        print(f"Linear complexity: min {min(lcs)}, max {max(lcs)}, mean {sum(lcs)/len(lcs):.1f}")
+    devs = column["max_profile_deviation"]
+    print(f"Largest deviation of the profile from i/2: min {min(devs):.1f}, max {max(devs):.1f}, mean {sum(devs)/len(devs):.1f}")
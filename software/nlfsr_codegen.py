@@ -0,0 +1,90 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+# Generates specialized Python functions for a single feedback function on the "vector" format.
+# The generic test_period walks the list of nonlinear terms and calls parity() for every step. Here the feedback is instead
+# written out as one expression with constant masks, e.g. "(s & 0x11).bit_count() ^ ((s & 0x88) == 0x88)" for
+# x_0 + x_4 + x_3*x_7, which is compiled once and kept in an LRU cache keyed by the vector format. Requires Python 3.10+.
+
+CACHE_SIZE = 256
+UNROLL = 8
+
+TEMPLATE = """
+def step(s):
+    return (s >> 1) | ((({fb}) & 1) << {top})
+
+# Number of steps until the state is back at start, or 0 if that does not happen within limit steps.
+# The loop is unrolled UNROLL times to cut down on loop overhead
+def period_from(start, limit):
+    s = start
+    for p in range(0, limit, {unroll}):
+{unrolled_steps}    return 0
+
+# Walk from s until the lowest bits of the state, given by dp_mask, are all zero. Returns (state, steps)
+def walk_to_dp(s, dp_mask):
+    steps = 0
+    while True:
+        s = (s >> 1) | ((({fb}) & 1) << {top})
+        steps += 1
+        if (s & dp_mask) == 0:
+            return s, steps
+
+# Walk from s to the next distinguished point like walk_to_dp, marking every state before it in the byte buffer "visited"
+def walk_mark_to_dp(s, dp_mask, visited):
+    steps = 0
+    while True:
+        visited[s >> 3] |= 1 << (s & 7)
+        s = (s >> 1) | ((({fb}) & 1) << {top})
+        steps += 1
+        if (s & dp_mask) == 0:
+            return s, steps
+
+# Walk from start until it is reached again, returning the cycle length, or until a distinguished point is reached, returning 0
+def cycle_without_dp(start, dp_mask):
+    s = start
+    length = 0
+    while True:
+        s = (s >> 1) | ((({fb}) & 1) << {top})
+        length += 1
+        if s == start:
+            return length
+        if (s & dp_mask) == 0:
+            return 0
+
+# Walk the cycle through start, marking every state in the byte buffer "visited" (one bit per state). Returns the cycle length
+def walk_mark(start, visited):
+    s = start
+    length = 0
+    while True:
+        visited[s >> 3] |= 1 << (s & 7)
+        s = (s >> 1) | ((({fb}) & 1) << {top})
+        length += 1
+        if s == start:
+            return length
+"""
+
+# The feedback expression for the state variable "s". Only the lowest bit of the result is valid.
+# The linear part is a popcount of a constant mask, and each nonlinear term is a comparison with its own constant mask
+def get_feedback_expr(lin: int, nlins: list, var: str = "s") -> str:
+    terms = [f"({var} & {lin:#x}).bit_count()"] if lin else []
+    for nl in nlins:
+        terms.append(f"(({var} & {nl:#x}) == {nl:#x})")
+    if len(terms) == 0:
+        return "0"
+    return " ^ ".join(terms)
+
+# Get the compiled functions for an NLFSR. nlins must be a tuple so the arguments can be used as a cache key
+@lru_cache(maxsize=CACHE_SIZE)
+def get_kernels(N: int, lin: int, nlins: tuple) -> SimpleNamespace:
+    fb = get_feedback_expr(lin, nlins)
+    step = f"        s = (s >> 1) | ((({fb}) & 1) << {N - 1})\n"
+    unrolled_steps = "".join(step + f"        if s == start:\n            return p + {k} if p + {k} <= limit else 0\n" for k in range(1, UNROLL + 1))
+    src = TEMPLATE.format(fb=fb, top=N - 1, unroll=UNROLL, unrolled_steps=unrolled_steps)
+    namespace = {}
+    exec(compile(src, f"<nlfsr N={N} lin={lin:#x} nlins={[hex(nl) for nl in nlins]}>", "exec"), namespace)
+    return SimpleNamespace(**{name: namespace[name] for name in ("step", "period_from", "walk_to_dp", "walk_mark_to_dp", "cycle_without_dp", "walk_mark")})
+
+# Same as nlfsr_utils.test_period, but several times faster
+def test_period(N: int, lin: int, nlins: list) -> int:
+    INIT = 1
+    return get_kernels(N, lin, tuple(nlins)).period_from(INIT, (1 << N) - 1)
@@ -32,6 +32,22 @@ def get_smallest_lex(N: int, lst: list) -> list:
     # If we get here, the lists are equal
     return lst
 
+# Get the form of a feedback function on the list format, as used for indexing the dataset. E.g. "7,0,1" for 7 linear terms and one cubic term
+def get_form(lst: list) -> str:
+    counts = [0] * max(len(term) for term in lst)
+    for term in lst:
+        counts[len(term)-1] += 1
+    return ",".join(str(c) for c in counts)
+
+# Simplify a function on the list format: repeated taps in a term are removed (x_k * x_k = x_k), and terms that appear an even
+# number of times cancel
+def reduce_function(lst: list) -> list:
+    terms = {}
+    for term in lst:
+        key = tuple(sorted(set(term)))
+        terms[key] = terms.get(key, 0) ^ 1
+    return order_lex([list(t) for t in terms if terms[t]])
+
 # Convert from the list format to a LaTeX string
 def format_list2tex(l: list) -> str:
     lex_list = order_lex(l)
@@ -70,6 +86,10 @@ def format_list2vec(lst_fmt: list) -> tuple[int, list]:
             nlins.append(tmp)
     return lin, nlins
 
+# Number of bits used for each tap index of the nonlinear terms in the fpga format. This is $clog2(N-1) in the HDL
+def get_idx_width(N: int) -> int:
+    return (N-2).bit_length()
+
 # Convert from the fpga format to list format
 def format_fpga2list(fpga_format: int, N: int, num_nlin: int, num_nlin_idx: int) -> list:
     lst_fmt = []
@@ -79,7 +99,7 @@ def format_fpga2list(fpga_format: int, N: int, num_nlin: int, num_nlin_idx: int)
         if (fpga_format >> i) & 1:
             lst_fmt.append([i])
 
-    clog2 = (N-1).bit_length()
+    clog2 = get_idx_width(N)
     clog2_mask = (1 << clog2) - 1
     
     for i in range(num_nlin):
@@ -115,7 +135,7 @@ def format_list2fpga(N: int, lst_fmt: list) -> int:
     num_nlin_idxs = len(nlins[0])
     fpga_form = lin >> 1
     # Now add all the nonlinear terms
-    clog2 = (N-1).bit_length() 
+    clog2 = get_idx_width(N)
     for i in range(len(nlins)):
         for j in range(num_nlin_idxs):
             fpga_form |= (nlins[i][j]-1) << (N -1 + clog2 * (i*num_nlin_idxs+j))
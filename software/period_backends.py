@@ -0,0 +1,198 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import nlfsr_utils
+import nlfsr_codegen
+import dp_verify
+import primitive_polys
+
+# A registry of backends for testing the period of NLFSRs on the "vector" format, behind one is_max_period/period API.
+# The first time a width and batch size is seen, the backends that can be used for the call are timed on a maximum period function
+# (the worst case, and the case that matters), and the timings are cached on disk. Every later call goes to the fastest backend.
+# Wider registers than CALIBRATION_MAX_N would take too long to time, so the backends are timed at CALIBRATION_MAX_N and
+# CALIBRATION_STEP widths below, and the time is extrapolated as a fixed cost plus a cost per state. The fixed costs matter,
+# e.g. the distinguished point verifier starts a process pool, which dominates for narrow registers but not for wide ones.
+# With cross_check, the result of the fastest backend is compared with the second fastest, and a mismatch raises an error.
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_FILE = os.path.join(os.path.expanduser("~"), ".cache", "nlfsr", "period_backends.json")
+SOURCE_FILES = ["nlfsr_utils.py", "nlfsr_codegen.py", "dp_verify.py", "primitive_polys.py", "period_backends.py"]
+CALIBRATION_MAX_N = 20
+CALIBRATION_STEP = 2 # The second width used for extrapolation is CALIBRATION_MAX_N - CALIBRATION_STEP
+
+class Backend:
+    # is_max_period(N, lin, nlins) -> bool, and optionally period(N, lin, nlins) -> int
+    # supports(N, lin, nlins) -> bool tells if the backend can test the function
+    # pool tells if batches should be spread over a process pool. Backends that are parallel on their own should set it to False.
+    # The worker processes get is_max_period itself, not the name of the backend, so backends registered at runtime also work
+    # with the spawn and forkserver start methods. It must therefore be picklable, e.g. a module level function, not a lambda
+    def __init__(self, name: str, is_max_period, period=None, supports=None, pool: bool = True):
+        self.name = name
+        self.is_max_period = is_max_period
+        self.period = period
+        self.supports = supports if supports is not None else (lambda N, lin, nlins: True)
+        self.pool = pool
+
+BACKENDS = {}
+
+def register_backend(backend: Backend):
+    BACKENDS[backend.name] = backend
+
+def _is_invertible(lin: int, nlins: list) -> bool:
+    return bool(lin & 1) and all((nl & 1) == 0 for nl in nlins)
+
+def reference_is_max_period(N: int, lin: int, nlins: list) -> bool:
+    return nlfsr_utils.test_period(N, lin, nlins) == (1 << N) - 1
+
+def codegen_is_max_period(N: int, lin: int, nlins: list) -> bool:
+    return nlfsr_codegen.test_period(N, lin, nlins) == (1 << N) - 1
+
+def dp_is_max_period(N: int, lin: int, nlins: list) -> bool:
+    return dp_verify.is_max_period(N, lin, nlins)
+
+def primitive_is_max_period(N: int, lin: int, nlins: list) -> bool:
+    return primitive_polys.is_primitive_lfsr(N, lin)
+
+register_backend(Backend("reference", reference_is_max_period, period=nlfsr_utils.test_period,
+                         supports=lambda N, lin, nlins: N < 25))
+register_backend(Backend("codegen", codegen_is_max_period, period=nlfsr_codegen.test_period,
+                         supports=lambda N, lin, nlins: N <= 32))
+register_backend(Backend("dp", dp_is_max_period,
+                         supports=lambda N, lin, nlins: N <= 40 and _is_invertible(lin, nlins),
+                         pool=False))
+register_backend(Backend("primitive", primitive_is_max_period,
+                         supports=lambda N, lin, nlins: len(nlins) == 0,
+                         pool=False))
+
+def get_source_version() -> str:
+    h = hashlib.sha256()
+    for f in SOURCE_FILES:
+        with open(os.path.join(SOFTWARE_DIR, f), "rb") as src:
+            h.update(src.read())
+    return h.hexdigest()[:16]
+
+_calibration = None
+
+def load_calibration(path: str = CALIBRATION_FILE) -> dict:
+    global _calibration
+    if _calibration is None:
+        _calibration = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("source_version") == get_source_version():
+                _calibration = data["timings"]
+    return _calibration
+
+def save_calibration(path: str = CALIBRATION_FILE):
+    if path is None:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + f".{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"source_version": get_source_version(), "timings": _calibration}, f, indent=4)
+    os.replace(tmp, path)
+
+# Batch sizes are rounded up to a power of two, and batches larger than the number of cores are timed as one batch per core
+def get_batch_bucket(batch: int) -> int:
+    cores = os.cpu_count() or 1
+    return 1 << (max(1, min(batch, cores)) - 1).bit_length()
+
+# A maximum period function of width N for timing: a primitive LFSR, or with x_k * x_k added if nonlinear (which does not change it)
+def get_calibration_function(N: int, nonlinear: bool) -> tuple[int, list]:
+    lin = primitive_polys.get_primitive_polys(N)[0] & ((1 << N) - 1)
+    if not nonlinear:
+        return lin, []
+    k = N // 2
+    return lin ^ (1 << k), [1 << k]
+
+def _run(task: tuple) -> bool:
+    is_max_period, N, lin, nlins = task
+    return is_max_period(N, lin, nlins)
+
+def _run_batch(backend: Backend, N: int, functions: list, processes: int = None) -> list:
+    if backend.pool and len(functions) > 1 and (processes or os.cpu_count() or 1) > 1:
+        with multiprocessing.Pool(processes) as pool:
+            return pool.map(_run, [(backend.is_max_period, N, lin, nlins) for lin, nlins in functions])
+    return [backend.is_max_period(N, lin, nlins) for lin, nlins in functions]
+
+def _get_key(N: int, batch: int, nonlinear: bool) -> str:
+    return f"{N}:{get_batch_bucket(batch)}:{'nonlinear' if nonlinear else 'linear'}"
+
+# Seconds per function at width N for the named backends, timed on a batch of copies of a maximum period function.
+# Only backends that have not been timed for this width and batch size are run
+def calibrate(N: int, names: list, batch: int = 1, nonlinear: bool = True, path: str = CALIBRATION_FILE) -> dict:
+    calibration = load_calibration(path)
+    timings = calibration.setdefault(_get_key(N, batch, nonlinear), {})
+    missing = [name for name in names if name not in timings]
+    if len(missing) > 0:
+        bucket = get_batch_bucket(batch)
+        lin, nlins = get_calibration_function(N, nonlinear)
+        for name in missing:
+            t = time.perf_counter()
+            results = _run_batch(BACKENDS[name], N, [(lin, nlins)] * bucket)
+            timings[name] = (time.perf_counter() - t) / bucket
+            assert all(results), f"The {name} backend did not find the maximum period of a primitive LFSR"
+        save_calibration(path)
+    return {name: timings[name] for name in names}
+
+# Estimated seconds per function at width N for the named backends. Above CALIBRATION_MAX_N the time is extrapolated from two
+# calibration widths as a + b * 2^N
+def get_costs(N: int, names: list, batch: int = 1, nonlinear: bool = True) -> dict:
+    if N <= CALIBRATION_MAX_N:
+        return calibrate(N, names, batch, nonlinear)
+    high, low = CALIBRATION_MAX_N, CALIBRATION_MAX_N - CALIBRATION_STEP
+    t_high = calibrate(high, names, batch, nonlinear)
+    t_low = calibrate(low, names, batch, nonlinear)
+    costs = {}
+    for name in names:
+        b = max(0.0, (t_high[name] - t_low[name]) / ((1 << high) - (1 << low)))
+        costs[name] = t_high[name] + b * ((1 << N) - (1 << high))
+    return costs
+
+# The backends that can test the functions, fastest first. Backends are filtered before they are timed, so e.g. period() never
+# starts the process pool of a backend it can not use
+def get_ranking(N: int, functions: list, need_period: bool = False, allow_parallel: bool = True) -> list:
+    names = [name for name, backend in BACKENDS.items()
+             if all(backend.supports(N, lin, nlins) for lin, nlins in functions)
+             and (backend.period is not None or not need_period)
+             and (backend.pool or allow_parallel)]
+    assert len(names) > 0, f"No backend can test these functions for N={N}"
+    nonlinear = any(len(nlins) > 0 for _, nlins in functions)
+    # The calibration functions must be supported as well
+    widths = [N] if N <= CALIBRATION_MAX_N else [CALIBRATION_MAX_N, CALIBRATION_MAX_N - CALIBRATION_STEP]
+    names = [name for name in names if all(BACKENDS[name].supports(w, *get_calibration_function(w, nonlinear)) for w in widths)]
+    costs = get_costs(N, names, len(functions), nonlinear)
+    return sorted(names, key=costs.get)
+
+# Test a batch of functions [(lin, nlins), ...] of width N. Returns a list of bools.
+# backend forces a backend by name. allow_parallel=False skips backends that start their own processes, e.g. in a pool worker
+def is_max_period_batch(N: int, functions: list, cross_check: bool = False, backend: str = None, allow_parallel: bool = True,
+                        processes: int = None) -> list:
+    if len(functions) == 0:
+        return []
+    ranking = [backend] if backend is not None else get_ranking(N, functions, allow_parallel=allow_parallel)
+    results = _run_batch(BACKENDS[ranking[0]], N, functions, processes)
+    if cross_check:
+        others = [name for name in get_ranking(N, functions, allow_parallel=allow_parallel) if name != ranking[0]]
+        if len(others) > 0:
+            check = _run_batch(BACKENDS[others[0]], N, functions, processes)
+            for (lin, nlins), a, b in zip(functions, results, check):
+                if a != b:
+                    raise RuntimeError(f"Backends {ranking[0]} and {others[0]} disagree for N={N}, lin={lin:#x}, nlins={[hex(nl) for nl in nlins]}: {a} != {b}")
+    return results
+
+def is_max_period(N: int, lin: int, nlins: list, cross_check: bool = False, backend: str = None, allow_parallel: bool = True) -> bool:
+    return is_max_period_batch(N, [(lin, nlins)], cross_check, backend, allow_parallel)[0]
+
+# The period of the cycle through the state 1, with the fastest backend that computes periods
+def period(N: int, lin: int, nlins: list, cross_check: bool = False) -> int:
+    ranking = get_ranking(N, [(lin, nlins)], need_period=True)
+    p = BACKENDS[ranking[0]].period(N, lin, nlins)
+    if cross_check and len(ranking) > 1:
+        q = BACKENDS[ranking[1]].period(N, lin, nlins)
+        if p != q:
+            raise RuntimeError(f"Backends {ranking[0]} and {ranking[1]} disagree for N={N}, lin={lin:#x}, nlins={[hex(nl) for nl in nlins]}: {p} != {q}")
+    return p
@@ -0,0 +1,179 @@
+import json
+import math
+import os
+import random
+from functools import lru_cache
+
+# Polynomials over GF(2) are represented as integers, bit i is the coefficient of x^i.
+# E.g. x^4 + x + 1 is 0b10011.
+# An LFSR on the "vector" format (see nlfsr_utils.format_list2vec) with width N and linear part "lin" has the
+# characteristic polynomial x^N + lin, so it is maximum period exactly when (1 << N) | lin is primitive.
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "primitive_polys.json")
+MAX_DEGREE = 64
+MAX_PENTANOMIALS = 16 # Number of pentanomials stored per degree in the table
+_table = None
+
+# Multiply a and b modulo the polynomial mod
+def mulmod(a: int, b: int, mod: int) -> int:
+    deg = mod.bit_length() - 1
+    if (a >> deg) & 1:
+        a ^= mod
+    res = 0
+    while b:
+        if b & 1:
+            res ^= a
+        b >>= 1
+        a <<= 1
+        if (a >> deg) & 1:
+            a ^= mod
+    return res
+
+# Compute x^e modulo the polynomial mod, using square and multiply
+def powmod_x(e: int, mod: int) -> int:
+    res = 1
+    base = 2 # The polynomial "x"
+    while e:
+        if e & 1:
+            res = mulmod(res, base, mod)
+        base = mulmod(base, base, mod)
+        e >>= 1
+    return res
+
+# Deterministic Miller-Rabin, these bases are sufficient for all n < 3.3 * 10^24
+def is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for p in bases:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+# Find a nontrivial factor of the composite n with Pollard's rho (Brent's variant)
+def pollard_rho(n: int) -> int:
+    if n % 2 == 0:
+        return 2
+    rng = random.Random(n)
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g, r, q = 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+# Returns the distinct prime factors of 2^N - 1, these are needed for the primitivity test
+@lru_cache(maxsize=None)
+def mersenne_prime_factors(N: int) -> tuple:
+    factors = set()
+    stack = [(1 << N) - 1]
+    while stack:
+        n = stack.pop()
+        if n == 1:
+            continue
+        if is_prime(n):
+            factors.add(n)
+            continue
+        f = pollard_rho(n)
+        stack.extend([f, n // f])
+    return tuple(sorted(factors))
+
+# Test if a polynomial is primitive, i.e. x has order exactly 2^N - 1 modulo the polynomial.
+# A reducible polynomial has fewer than 2^N - 1 units in its residue ring, so no separate irreducibility test is needed.
+def is_primitive(poly: int) -> bool:
+    N = poly.bit_length() - 1
+    if N < 1 or not (poly & 1):
+        return False
+    order = (1 << N) - 1
+    if powmod_x(order, poly) != 1:
+        return False
+    for q in mersenne_prime_factors(N):
+        if q != order and powmod_x(order // q, poly) == 1:
+            return False
+    return True
+
+# Test if an LFSR on the "vector" format has maximum period. Only valid for purely linear feedback functions.
+def is_primitive_lfsr(N: int, lin: int) -> bool:
+    return is_primitive((1 << N) | lin)
+
+# Build the polynomial x^N + x^e_0 + ... + 1 from the list of middle exponents
+def exps2poly(N: int, exps: list) -> int:
+    poly = (1 << N) | 1
+    for e in exps:
+        poly |= 1 << e
+    return poly
+
+# Lazily load the table of primitive trinomials and pentanomials.
+def get_table() -> dict:
+    global _table
+    if _table is None:
+        with open(TABLE_FILE) as f:
+            _table = {int(n): v for n, v in json.load(f).items()}
+    return _table
+
+# Get the primitive polynomials for degree N from the table. With terms="min", only the polynomials with the
+# fewest number of terms are returned (trinomials if there are any), otherwise all of them.
+def get_primitive_polys(N: int, terms="min") -> list:
+    assert (2 <= N <= MAX_DEGREE), f"The table covers degrees 2 to {MAX_DEGREE}"
+    entry = get_table()[N]
+    polys = [exps2poly(N, e) for e in entry["trinomials"]]
+    if terms != "min" or len(polys) == 0:
+        polys += [exps2poly(N, e) for e in entry["pentanomials"]]
+    return polys
+
+# Pick a random primitive polynomial of degree N from the table
+def random_primitive_poly(N: int, terms="min") -> int:
+    return random.choice(get_primitive_polys(N, terms))
+
+# Generate the table by brute force. Takes less than a minute, and only needs to be done if MAX_DEGREE or MAX_PENTANOMIALS change
+def generate_table() -> dict:
+    table = {}
+    for N in range(2, MAX_DEGREE + 1):
+        trinomials = [[k] for k in range(1, N) if is_primitive(exps2poly(N, [k]))]
+        candidates = ([c, b, a] for a in range(3, N) for b in range(2, a) for c in range(1, b))
+        pentanomials = []
+        for exps in candidates:
+            if len(pentanomials) == MAX_PENTANOMIALS:
+                break
+            if is_primitive(exps2poly(N, exps)):
+                pentanomials.append(exps)
+        table[str(N)] = {"trinomials": trinomials, "pentanomials": pentanomials}
+    return table
+
+if __name__ == "__main__":
+    table = generate_table()
+    # One line per degree keeps the file readable
+    lines = [f'    "{n}": {json.dumps(v)}' for n, v in table.items()]
+    with open(TABLE_FILE, "w") as f:
+        f.write("{\n" + ",\n".join(lines) + "\n}\n")
+    print(f"Wrote {TABLE_FILE}")
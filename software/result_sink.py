@@ -0,0 +1,131 @@
+import json
+import os
+import nlfsr_utils
+
+# A sink for search results that merges them into the dataset.
+# Hits are received on the FPGA format, converted to the list format, reduced (x_k * x_k = x_k, and duplicate terms cancel) and
+# canonicalized (smallest lexicographic form), and
+# deduplicated against the dataset and earlier hits. New hits are appended to a write-ahead log (one JSON object per line),
+# which is cheap and survives crashes. merge() moves the logged hits into the dataset, updating nlfsr_count for the affected
+# (n, form) sections, and replaces the dataset file atomically.
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "nlfsr_dataset.json")
+
+# Write the dataset with the same layout as nlfsr_dataset.json, one function per line
+def dump_dataset(dataset: dict, f):
+    ind = "    "
+    n_chunks = []
+    for n in dataset:
+        form_chunks = []
+        for form in dataset[n]:
+            section = dataset[n][form]
+            functions = "[]"
+            if len(section["functions"]) > 0:
+                lines = [f"{ind*4}{json.dumps(fn)}" for fn in section["functions"]]
+                functions = "[\n" + ",\n".join(lines) + f"\n{ind*3}]"
+            form_chunks.append(f'{ind*2}"{form}": {{\n{ind*3}"nlfsr_count": {section["nlfsr_count"]},\n{ind*3}"functions": {functions}\n{ind*2}}}')
+        n_chunks.append(f'{ind}"{n}": {{\n' + ",\n".join(form_chunks) + f"\n{ind}}}")
+    f.write("{\n" + ",\n".join(n_chunks) + "\n}")
+
+class ResultSink:
+    def __init__(self, dataset_path: str = DATASET_FILE, wal_path: str = None, sync: bool = True):
+        self.dataset_path = dataset_path
+        self.wal_path = wal_path if wal_path is not None else dataset_path + ".wal"
+        self.sync = sync # fsync the log after every hit
+        self.known = None # Set of (n, canonical function) that are already in the dataset or the log
+
+    def _key(self, N: int, lst: list) -> tuple:
+        return (N, json.dumps(lst))
+
+    # Read the entries in the write-ahead log, as a list of (n, form, function)
+    def read_log(self) -> list:
+        entries = []
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        e = json.loads(line)
+                        entries.append((e["n"], e["form"], e["function"]))
+        return entries
+
+    # The set of known functions is built lazily, so a sink that is never used does not have to read the whole dataset
+    def _load_known(self):
+        self.known = set()
+        with open(self.dataset_path) as f:
+            dataset = json.load(f)
+        for n in dataset:
+            for form in dataset[n]:
+                for fn in dataset[n][form]["functions"]:
+                    self.known.add(self._key(int(n), nlfsr_utils.get_smallest_lex(int(n), fn)))
+        for N, _, fn in self.read_log():
+            self.known.add(self._key(N, fn))
+
+    # Add a hit on the list format. Returns True if it was new, False if it was a duplicate or not a nonlinear function
+    def add_list(self, N: int, lst: list) -> bool:
+        lst = nlfsr_utils.reduce_function(lst)
+        # A hit where every nonlinear term reduced or cancelled away is just a primitive LFSR
+        if all(len(term) == 1 for term in lst):
+            return False
+        if self.known is None:
+            self._load_known()
+        lst = nlfsr_utils.get_smallest_lex(N, lst)
+        key = self._key(N, lst)
+        if key in self.known:
+            return False
+        self.known.add(key)
+        with open(self.wal_path, "a") as f:
+            f.write(json.dumps({"n": N, "form": nlfsr_utils.get_form(lst), "function": lst}) + "\n")
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        return True
+
+    # Add a hit on the FPGA format, as read from the accelerator. Hits that no longer have the form of the search configuration
+    # after reduction (num_nlin terms of degree num_nlin_idx) are rejected
+    def add(self, fpga_setting: int, N: int, num_nlin: int, num_nlin_idx: int) -> bool:
+        lst = nlfsr_utils.reduce_function(nlfsr_utils.format_fpga2list(fpga_setting, N, num_nlin, num_nlin_idx))
+        if len(lst) == 0:
+            return False
+        counts = nlfsr_utils.get_form(lst).split(",")
+        if len(counts) != num_nlin_idx or counts[-1] != str(num_nlin) or any(c != "0" for c in counts[1:-1]):
+            return False
+        return self.add_list(N, lst)
+
+    # Merge the logged hits into the dataset. Returns the number of functions that were added.
+    def merge(self) -> int:
+        entries = self.read_log()
+        if len(entries) == 0:
+            return 0
+        with open(self.dataset_path) as f:
+            dataset = json.load(f)
+        # Only the sections that get new entries need to be checked for duplicates
+        affected = {}
+        num_added = 0
+        for N, form, fn in entries:
+            n = str(N)
+            if (n, form) not in affected:
+                functions = dataset.get(n, {}).get(form, {}).get("functions", [])
+                affected[(n, form)] = {json.dumps(nlfsr_utils.get_smallest_lex(N, x)) for x in functions}
+            if json.dumps(fn) in affected[(n, form)]:
+                continue # Already merged, e.g. if a previous merge was interrupted before the log was cleared
+            affected[(n, form)].add(json.dumps(fn))
+            if n not in dataset:
+                dataset[n] = {}
+                dataset = {k: dataset[k] for k in sorted(dataset, key=int)}
+            section = dataset[n].setdefault(form, {"nlfsr_count": 0, "functions": []})
+            section["functions"].append(fn)
+            num_added += 1
+        for n, form in affected:
+            if form in dataset.get(n, {}):
+                dataset[n][form]["nlfsr_count"] = len(dataset[n][form]["functions"])
+
+        tmp = self.dataset_path + ".tmp"
+        with open(tmp, "w") as f:
+            dump_dataset(dataset, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.dataset_path)
+        os.remove(self.wal_path)
+        return num_added
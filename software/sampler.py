@@ -0,0 +1,86 @@
+import hashlib
+import nlfsr_utils
+
+# A pseudo-random sampler of candidate settings on the FPGA format that never repeats a candidate.
+# Every valid setting corresponds to an index in [0, size): the lowest n-1 bits of the index are the linear terms, and the rest of
+# the index is the tap positions written in base n-1, so every tap stays in the valid range [0, n-2] of its $clog2(n-1) bit field.
+# Candidate number i is the setting with index permute(i), where permute is a keyed bijection on [0, size) made from a Feistel
+# network on the smallest even number of bits that covers size, with cycle walking to get back into [0, size).
+# Since no history needs to be stored, the stream can be split between workers by ranges of i, and resumed from a counter.
+
+ROUNDS = 8
+MASK64 = (1 << 64) - 1
+
+# The splitmix64 finalizer, a cheap and well mixing function on 64-bit integers
+def mix64(x: int) -> int:
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+class CandidateSampler:
+    def __init__(self, n: int, num_nlin: int, num_nlin_idx: int, key: int = 0):
+        self.n = n
+        self.num_taps = num_nlin * num_nlin_idx
+        self.idx_width = nlfsr_utils.get_idx_width(n)
+        self.size = (1 << (n - 1)) * (n - 1) ** self.num_taps
+        self.half_bits = max(1, ((self.size - 1).bit_length() + 1) // 2)
+        self.half_mask = (1 << self.half_bits) - 1
+        self.key = key.to_bytes(16, "little")
+        digest = hashlib.blake2b(self.key, digest_size=8 * ROUNDS).digest()
+        self.round_keys = [int.from_bytes(digest[8*r:8*r + 8], "little") for r in range(ROUNDS)]
+
+    # Convert between an index in [0, size) and a setting on the FPGA format
+    def index_to_setting(self, index: int) -> int:
+        setting = index & ((1 << (self.n - 1)) - 1)
+        rest = index >> (self.n - 1)
+        for i in range(self.num_taps):
+            rest, idx = divmod(rest, self.n - 1)
+            setting |= idx << (self.n - 1 + self.idx_width * i)
+        return setting
+
+    def setting_to_index(self, setting: int) -> int:
+        index = 0
+        idx_mask = (1 << self.idx_width) - 1
+        for i in reversed(range(self.num_taps)):
+            idx = (setting >> (self.n - 1 + self.idx_width * i)) & idx_mask
+            assert (idx < self.n - 1), "Tap index out of range"
+            index = index * (self.n - 1) + idx
+        return (index << (self.n - 1)) | (setting & ((1 << (self.n - 1)) - 1))
+
+    # The round function. Halves of up to 64 bits use mix64, wider ones fall back to a keyed hash
+    def _round(self, r: int, x: int) -> int:
+        if self.half_bits <= 64:
+            return mix64(x ^ self.round_keys[r]) & self.half_mask
+        num_bytes = (self.half_bits + 7) // 8
+        assert (num_bytes <= 64), "Settings are too wide for the sampler"
+        data = r.to_bytes(1, "little") + x.to_bytes(num_bytes, "little")
+        h = hashlib.blake2b(data, key=self.key, digest_size=num_bytes).digest()
+        return int.from_bytes(h, "little") & self.half_mask
+
+    def _feistel(self, x: int) -> int:
+        left, right = x >> self.half_bits, x & self.half_mask
+        for r in range(ROUNDS):
+            left, right = right, left ^ self._round(r, right)
+        return (left << self.half_bits) | right
+
+    # The keyed bijection on [0, size). The Feistel network permutes [0, 2^(2*half_bits)), and applying it again until
+    # the value lands in [0, size) (cycle walking) gives a permutation of [0, size)
+    def permute(self, i: int) -> int:
+        assert (0 <= i < self.size), "Index out of range"
+        x = self._feistel(i)
+        while x >= self.size:
+            x = self._feistel(x)
+        return x
+
+    def get(self, i: int) -> int:
+        return self.index_to_setting(self.permute(i))
+
+    # The range [start, stop) of candidate numbers for one of num_workers workers
+    def worker_range(self, worker: int, num_workers: int) -> tuple[int, int]:
+        return (self.size * worker // num_workers, self.size * (worker + 1) // num_workers)
+
+    # Yield the candidates with numbers in [start, stop). To resume, pass the number of candidates already consumed as start
+    def stream(self, start: int = 0, stop: int = None):
+        stop = self.size if stop is None else min(stop, self.size)
+        for i in range(start, stop):
+            yield self.get(i)
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+# Scheduling of search time across (width, form) search jobs on the available resources (e.g. the FPGA and the CPU).
+# For every job the scheduler keeps an estimate of the hit rate (new dataset entries per tested candidate) and, per resource,
+# of the cost (seconds per tested candidate). The hit rate has a Beta posterior, so a job with few tested candidates is uncertain.
+# The time of each resource is split between the jobs with Thompson sampling: a job gets the share of the posterior draws where
+# it gives the most new entries per second on that resource. A fixed exploration floor is spread evenly over the jobs, so that
+# every job keeps being sampled and the estimates can follow e.g. a form that is running out of new entries.
+# The estimates are updated with record() as results arrive, and the counts, estimates and shares are written to a progress file
+# every SAVE_INTERVAL records (and on save()), which is also used to resume the scheduler.
+# With a half life, the counts of all jobs decay with the wall-clock time the scheduler has been running, so the estimates of
+# jobs that are not being run age as well. Time between runs (from the progress file to the next start) does not count.
+# Usage: python scheduler.py [--progress <file>]
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROGRESS_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "search_progress.json")
+SAVE_INTERVAL = 100 # Save the progress file after this many records
+
+def get_job_key(n: int, form: str) -> str:
+    return f"{n}:{form}"
+
+class Scheduler:
+    def __init__(self, progress_path: str = PROGRESS_FILE, floor: float = 0.1, prior_rate: float = 1e-3, prior_weight: float = 1000,
+                 half_life: float = None, num_samples: int = 1000, seed: int = None):
+        self.progress_path = progress_path
+        self.floor = floor # Share of each resource spread evenly over the jobs, for exploration
+        # The Beta prior on the hit rate, as prior_weight pseudo-candidates of which a fraction prior_rate are hits
+        self.prior_hits = prior_rate * prior_weight
+        self.prior_misses = (1 - prior_rate) * prior_weight
+        self.half_life = half_life # If set, the counts of all jobs are halved every half_life seconds of wall-clock time
+        self.last_decay = time.time()
+        self.num_unsaved = 0
+        self.num_samples = num_samples
+        self.rng = np.random.default_rng(seed)
+        self.jobs = {} # key -> {"n", "form", "tested", "hits", "resources": {resource: {"tested", "seconds"}}}
+        if progress_path is not None and os.path.exists(progress_path):
+            with open(progress_path) as f:
+                progress = json.load(f)
+            for key, job in progress["jobs"].items():
+                self.jobs[key] = {"n": job["n"], "form": job["form"], "tested": job["tested"], "hits": job["hits"],
+                                  "resources": {r: {"tested": s["tested"], "seconds": s["seconds"]} for r, s in job["resources"].items()}}
+
+    # Add a job that can be run on the given resources. Jobs that are already known (e.g. from the progress file) keep their counts
+    def add_job(self, n: int, form: str, resources=("fpga", "cpu")) -> str:
+        key = get_job_key(n, form)
+        job = self.jobs.setdefault(key, {"n": n, "form": form, "tested": 0, "hits": 0, "resources": {}})
+        for r in resources:
+            job["resources"].setdefault(r, {"tested": 0, "seconds": 0.0})
+        return key
+
+    # Decay the counts of all jobs by the wall-clock time since the last decay
+    def decay(self, now: float = None):
+        now = time.time() if now is None else now
+        if self.half_life is not None:
+            factor = 0.5 ** ((now - self.last_decay) / self.half_life)
+            for job in self.jobs.values():
+                job["tested"] *= factor
+                job["hits"] *= factor
+                for s in job["resources"].values():
+                    s["tested"] *= factor
+                    s["seconds"] *= factor
+        self.last_decay = now
+
+    # Record that tested candidates of the job were tested on the resource in the given number of seconds, giving new_entries
+    # new dataset entries (e.g. the number of times ResultSink.add returned True). The progress file is saved every
+    # SAVE_INTERVAL records if save is set
+    def record(self, key: str, resource: str, tested: int, new_entries: int, seconds: float, save: bool = True):
+        self.decay()
+        job = self.jobs[key]
+        job["tested"] += tested
+        job["hits"] += new_entries
+        stats = job["resources"][resource]
+        stats["tested"] += tested
+        stats["seconds"] += seconds
+        self.num_unsaved += 1
+        if save and self.num_unsaved >= SAVE_INTERVAL:
+            self.save()
+
+    def _posterior(self, key: str) -> tuple[float, float]:
+        job = self.jobs[key]
+        return self.prior_hits + job["hits"], self.prior_misses + job["tested"] - job["hits"]
+
+    def hit_rate(self, key: str) -> float:
+        a, b = self._posterior(key)
+        return a / (a + b)
+
+    # Seconds per candidate for the job on the resource, None if it has not been measured
+    def cost(self, key: str, resource: str):
+        stats = self.jobs[key]["resources"][resource]
+        return stats["seconds"] / stats["tested"] if stats["tested"] > 0 else None
+
+    def _costs(self, keys: list, resource: str) -> np.ndarray:
+        costs = [self.cost(k, resource) for k in keys]
+        measured = [c for c in costs if c is not None]
+        # Jobs that have not been run on the resource are assumed to cost the same as the median job, so their hit rate decides
+        default = float(np.median(measured)) if len(measured) > 0 else 1.0
+        return np.array([c if c is not None else default for c in costs])
+
+    # The share of the time on the resource that each job should get, as a dict {key: share}
+    def allocation(self, resource: str) -> dict:
+        keys = [k for k in self.jobs if resource in self.jobs[k]["resources"]]
+        if len(keys) == 0:
+            return {}
+        a, b = np.array([self._posterior(k) for k in keys]).T
+        draws = self.rng.beta(a, b, size=(self.num_samples, len(keys))) / self._costs(keys, resource)
+        wins = np.bincount(np.argmax(draws, axis=1), minlength=len(keys)) / self.num_samples
+        shares = self.floor / len(keys) + (1 - self.floor) * wins
+        return {k: float(s) for k, s in zip(keys, shares)}
+
+    # Pick the job to run next on the resource: the one whose share of the time spent so far is the furthest below its allocation
+    def next_job(self, resource: str) -> str:
+        shares = self.allocation(resource)
+        seconds = {k: self.jobs[k]["resources"][resource]["seconds"] for k in shares}
+        total = sum(seconds.values())
+        return max(shares, key=lambda k: shares[k] - (seconds[k] / total if total > 0 else 0.0))
+
+    # Expected new entries per hour for the job on the resource, None if the cost has not been measured
+    def entries_per_hour(self, key: str, resource: str):
+        c = self.cost(key, resource)
+        return 3600 * self.hit_rate(key) / c if c is not None and c > 0 else None
+
+    def get_progress(self) -> dict:
+        resources = sorted({r for job in self.jobs.values() for r in job["resources"]})
+        allocations = {r: self.allocation(r) for r in resources}
+        jobs = {}
+        total_rate = 0.0
+        for key, job in self.jobs.items():
+            a, b = self._posterior(key)
+            low, high = np.quantile(self.rng.beta(a, b, size=self.num_samples), [0.05, 0.95])
+            job_rate = 0.0
+            res = {}
+            for r, stats in job["resources"].items():
+                rate = self.entries_per_hour(key, r)
+                share = allocations[r][key]
+                if rate is not None:
+                    job_rate += share * rate
+                res[r] = {"tested": stats["tested"], "seconds": stats["seconds"], "seconds_per_candidate": self.cost(key, r),
+                          "entries_per_hour": rate, "share": share}
+            total_rate += job_rate
+            jobs[key] = {"n": job["n"], "form": job["form"], "tested": job["tested"], "hits": job["hits"],
+                         "hit_rate": self.hit_rate(key), "hit_rate_90": [float(low), float(high)],
+                         "expected_entries_per_hour": job_rate, "resources": res}
+        return {"updated": time.time(), "expected_entries_per_hour": total_rate, "jobs": jobs}
+
+    def save(self):
+        self.num_unsaved = 0
+        if self.progress_path is None:
+            return
+        tmp = self.progress_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.get_progress(), f, indent=4)
+        os.replace(tmp, self.progress_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the search progress and the time allocation of the scheduler")
+    parser.add_argument("--progress", default=PROGRESS_FILE, help="Path to the progress file")
+    args = parser.parse_args()
+    progress = Scheduler(args.progress).get_progress()
+    for key, job in progress["jobs"].items():
+        shares = ", ".join(f"{r} {s['share']:.2f}" for r, s in job["resources"].items())
+        print(f"n={job['n']}, form={job['form']}: {job['hits']:.0f} new entries in {job['tested']:.0f} candidates, "
+              f"hit rate {job['hit_rate']:.2e}, {job['expected_entries_per_hour']:.1f} entries per hour (shares: {shares})")
+    print(f"Expected new entries per hour: {progress['expected_entries_per_hour']:.1f}")
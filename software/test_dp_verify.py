@@ -0,0 +1,51 @@
+import json
+import os
+import random
+import pytest
+import nlfsr_utils
+import nlfsr_codegen
+import dp_verify
+
+# Checks the distinguished point verifier and the generated period test against the reference nlfsr_utils.test_period.
+# Run using "pytest" from the software directory
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "nlfsr_dataset.json")
+
+# A random invertible function on the vector format: x_0 is a linear term and not part of any nonlinear term
+def get_random_invertible(rng: random.Random, N: int, num_nlin: int) -> tuple[int, list]:
+    lin = rng.getrandbits(N) | 1
+    nlins = []
+    for _ in range(num_nlin):
+        taps = rng.sample(range(1, N), rng.randint(2, 3))
+        nlins.append(sum(1 << t for t in taps))
+    return lin, nlins
+
+def get_random_functions() -> list:
+    rng = random.Random(1)
+    return [(N, *get_random_invertible(rng, N, num_nlin)) for N in (6, 9, 12) for num_nlin in (0, 1, 2) for _ in range(4)]
+
+# A few functions from the dataset, so there are maximum period ones as well
+def get_dataset_functions() -> list:
+    with open(DATASET_FILE) as f:
+        dataset = json.load(f)
+    return [(int(n), *nlfsr_utils.format_list2vec(fn)) for n in ("10", "12") for form in list(dataset[n])[:3]
+            for fn in dataset[n][form]["functions"][:2]]
+
+DATASET_FUNCTIONS = get_dataset_functions()
+FUNCTIONS = get_random_functions() + DATASET_FUNCTIONS
+
+@pytest.mark.parametrize("N, lin, nlins", FUNCTIONS)
+def test_codegen_period(N, lin, nlins):
+    assert nlfsr_codegen.test_period(N, lin, nlins) == nlfsr_utils.test_period(N, lin, nlins)
+
+@pytest.mark.parametrize("N, lin, nlins", FUNCTIONS)
+def test_dp_verify(N, lin, nlins):
+    expected = nlfsr_utils.test_period(N, lin, nlins) == (1 << N) - 1
+    # Few dp_bits give many short segments, more give a few long ones
+    for dp_bits in (1, N // 2, N - 1):
+        assert dp_verify.is_max_period(N, lin, nlins, dp_bits=dp_bits, processes=1) == expected
+
+@pytest.mark.parametrize("N, lin, nlins", DATASET_FUNCTIONS)
+def test_dataset_functions_have_max_period(N, lin, nlins):
+    assert nlfsr_utils.test_period(N, lin, nlins) == (1 << N) - 1
@@ -0,0 +1,66 @@
+import json
+import random
+import pytest
+import keystream
+import primitive_polys
+import linear_complexity
+
+# Checks the packed Berlekamp-Massey implementation against a naive one on lists of bits.
+# Run using "pytest" from the software directory
+
+# Textbook Berlekamp-Massey over GF(2). Returns (linear complexity, linear complexity profile)
+def naive_berlekamp_massey(bits: list) -> tuple[int, list]:
+    C, B = [1] + [0] * len(bits), [1] + [0] * len(bits)
+    L, m = 0, 1
+    profile = []
+    for i in range(len(bits)):
+        d = bits[i]
+        for k in range(1, L + 1):
+            d ^= C[k] & bits[i - k]
+        if d:
+            T = C[:]
+            for k in range(m, len(C)):
+                C[k] ^= B[k - m]
+            if 2 * L <= i:
+                L, B, m = i + 1 - L, T, 1
+            else:
+                m += 1
+        else:
+            m += 1
+        profile.append(L)
+    return L, profile
+
+def to_bits(seq, nbits: int) -> list:
+    return [(seq[i // 8] >> (i % 8)) & 1 for i in range(nbits)]
+
+def to_bytes(bits: list) -> bytes:
+    return bytes(sum(bits[i + b] << b for b in range(min(8, len(bits) - i))) for i in range(0, len(bits), 8))
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("nbits", [1, 7, 64, 301, 1000])
+def test_random_sequences(seed, nbits):
+    rng = random.Random(seed)
+    bits = [rng.getrandbits(1) for _ in range(nbits)]
+    assert linear_complexity.berlekamp_massey(to_bytes(bits), nbits) == naive_berlekamp_massey(bits)
+
+# Sequences with long runs of zeros and a late nonzero bit, where the linear complexity jumps
+@pytest.mark.parametrize("nbits, ones", [(50, []), (50, [49]), (200, [0, 150]), (200, [120, 121, 180])])
+def test_sparse_sequences(nbits, ones):
+    bits = [int(i in ones) for i in range(nbits)]
+    assert linear_complexity.berlekamp_massey(to_bytes(bits), nbits) == naive_berlekamp_massey(bits)
+
+# Sequences from the dataset functions, and from a primitive LFSR, whose linear complexity is its width.
+# The naive implementation is slow, so only the narrowest width is checked on two full periods, the others on a prefix
+@pytest.mark.parametrize("N, nbits", [(10, linear_complexity.get_nbits(10)), (12, 1000), (16, 1000)])
+def test_keystreams(N, nbits):
+    with open(linear_complexity.DATASET_FILE) as f:
+        dataset = json.load(f)
+    functions = [dataset[str(N)][form]["functions"][0] for form in dataset[str(N)]]
+    lin = primitive_polys.get_primitive_polys(N)[0] & ((1 << N) - 1)
+    lfsr = [[i] for i in range(N) if (lin >> i) & 1]
+    for fn in functions + [lfsr]:
+        seq = keystream.keystream(N, fn, 1, (nbits + 7) // 8)
+        result = linear_complexity.berlekamp_massey(seq, nbits)
+        assert result == naive_berlekamp_massey(to_bits(seq, nbits))
+        if fn is lfsr:
+            assert result[0] == N
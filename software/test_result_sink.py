@@ -0,0 +1,92 @@
+import json
+import os
+import pytest
+import nlfsr_utils
+import result_sink
+
+# Checks the deduplication and merging of the result sink on a small copy of a dataset section.
+# Run using "pytest" from the software directory
+
+N = 10
+FORM = "3,1"
+
+@pytest.fixture
+def functions():
+    with open(result_sink.DATASET_FILE) as f:
+        return json.load(f)[str(N)][FORM]["functions"][:4]
+
+# A dataset with all but the last of the functions, so the last one is a new hit
+@pytest.fixture
+def sink(tmp_path, functions):
+    path = os.path.join(tmp_path, "dataset.json")
+    with open(path, "w") as f:
+        result_sink.dump_dataset({str(N): {FORM: {"nlfsr_count": len(functions) - 1, "functions": functions[:-1]}}}, f)
+    return result_sink.ResultSink(path, sync=False)
+
+def load(sink: result_sink.ResultSink) -> dict:
+    with open(sink.dataset_path) as f:
+        return json.load(f)
+
+def test_known_functions_are_duplicates(sink, functions):
+    for fn in functions[:-1]:
+        assert not sink.add_list(N, fn)
+        assert not sink.add_list(N, nlfsr_utils.get_reciprocal(N, fn))
+    assert sink.read_log() == []
+
+def test_new_function_is_logged_once(sink, functions):
+    fn = functions[-1]
+    assert sink.add_list(N, fn)
+    assert not sink.add_list(N, fn)
+    assert not sink.add_list(N, nlfsr_utils.get_reciprocal(N, fn))
+    # Terms in another order, and the same hit on the FPGA format
+    assert not sink.add_list(N, fn[::-1])
+    assert not sink.add(nlfsr_utils.format_list2fpga(N, fn), N, 1, 2)
+    assert sink.read_log() == [(N, FORM, nlfsr_utils.get_smallest_lex(N, fn))]
+    # A new sink reads the known hits back from the log
+    assert not result_sink.ResultSink(sink.dataset_path, sync=False).add_list(N, fn)
+
+def test_repeated_taps_are_reduced(sink, functions):
+    fn = functions[-1]
+    # x_k * x_k = x_k, so a quadratic term with a repeated tap is just a linear term and the hit is an LFSR
+    assert not sink.add_list(N, [[1], [3, 3]] + [term for term in fn if len(term) == 1])
+    lin = nlfsr_utils.format_list2fpga(N, [term for term in fn if len(term) == 1] + [[4, 4]])
+    assert not sink.add(lin, N, 1, 2)
+    # Two equal nonlinear terms cancel, which also leaves an LFSR
+    duplicated = [term for term in fn if len(term) == 1] + [[2, 5], [2, 5]]
+    assert not sink.add(nlfsr_utils.format_list2fpga(N, duplicated), N, 2, 2)
+    # A repeated tap in a cubic term gives a quadratic term, so the hit is logged as the quadratic function, once
+    cubic = [term if len(term) == 1 else term + term[:1] for term in fn]
+    assert sink.add_list(N, cubic)
+    assert not sink.add_list(N, fn)
+    assert sink.read_log() == [(N, FORM, nlfsr_utils.get_smallest_lex(N, fn))]
+
+def test_merge(sink, functions):
+    assert sink.add_list(N, nlfsr_utils.get_reciprocal(N, functions[-1]))
+    assert sink.merge() == 1
+    assert not os.path.exists(sink.wal_path)
+    section = load(sink)[str(N)][FORM]
+    assert section["nlfsr_count"] == len(functions)
+    assert section["functions"][:-1] == functions[:-1]
+    assert section["functions"][-1] == nlfsr_utils.get_smallest_lex(N, functions[-1])
+    assert sink.merge() == 0
+
+# If a merge is interrupted after the dataset is replaced but before the log is removed, merging again does not add duplicates
+def test_merge_replayed_log(sink, functions):
+    assert sink.add_list(N, functions[-1])
+    with open(sink.wal_path) as f:
+        log = f.read()
+    assert sink.merge() == 1
+    with open(sink.wal_path, "w") as f:
+        f.write(log)
+    assert sink.merge() == 0
+    assert load(sink)[str(N)][FORM]["nlfsr_count"] == len(functions)
+
+def test_merge_new_width(sink, functions):
+    # Widths are kept in numeric order when a new one is added
+    fn = [[0], [2], [5], [3, 7]]
+    assert sink.add_list(8, fn)
+    assert sink.add_list(12, [[0], [4], [9], [2, 6]])
+    assert sink.merge() == 2
+    dataset = load(sink)
+    assert list(dataset) == ["8", "10", "12"]
+    assert dataset["8"][FORM] == {"nlfsr_count": 1, "functions": [nlfsr_utils.get_smallest_lex(8, fn)]}
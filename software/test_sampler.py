@@ -0,0 +1,40 @@
+import pytest
+import nlfsr_utils
+import sampler
+
+# Checks that the candidate sampler visits every setting exactly once for small configurations.
+# Run using "pytest" from the software directory
+
+# (n, num_nlin, num_nlin_idx). Sizes 4, 64 and 256 are powers of two, the others need cycle walking
+CONFIGS = [(3, 0, 2), (4, 1, 2), (5, 1, 1), (5, 1, 2), (6, 1, 2), (6, 2, 2)]
+
+@pytest.mark.parametrize("n, num_nlin, num_nlin_idx", CONFIGS)
+@pytest.mark.parametrize("key", [0, 1, 12345])
+def test_permute_is_bijection(n, num_nlin, num_nlin_idx, key):
+    s = sampler.CandidateSampler(n, num_nlin, num_nlin_idx, key)
+    assert sorted(s.permute(i) for i in range(s.size)) == list(range(s.size))
+
+@pytest.mark.parametrize("n, num_nlin, num_nlin_idx", CONFIGS)
+def test_settings_are_valid_and_unique(n, num_nlin, num_nlin_idx):
+    s = sampler.CandidateSampler(n, num_nlin, num_nlin_idx, key=7)
+    settings = list(s.stream())
+    assert len(set(settings)) == s.size
+    idx_width = nlfsr_utils.get_idx_width(n)
+    for setting in settings:
+        assert s.index_to_setting(s.setting_to_index(setting)) == setting
+        for i in range(num_nlin * num_nlin_idx):
+            assert (setting >> (n - 1 + idx_width * i)) & ((1 << idx_width) - 1) <= n - 2
+
+# The worker ranges split the stream without gaps or overlaps
+def test_worker_ranges():
+    s = sampler.CandidateSampler(6, 1, 2, key=3)
+    num_workers = 7
+    settings = []
+    for worker in range(num_workers):
+        settings += list(s.stream(*s.worker_range(worker, num_workers)))
+    assert settings == list(s.stream())
+
+def test_keys_give_different_orders():
+    a = sampler.CandidateSampler(6, 1, 2, key=1)
+    b = sampler.CandidateSampler(6, 1, 2, key=2)
+    assert [a.permute(i) for i in range(a.size)] != [b.permute(i) for i in range(b.size)]
@@ -0,0 +1,105 @@
+import mmap
+import os
+import numpy as np
+import nlfsr_utils
+
+# A persistent index of tested candidates, so that random searches can skip settings that earlier runs already tested.
+# There is one index per (width, num_nlin, num_nlin_idx), stored in index_dir.
+# Tested settings go into a blocked Bloom filter that is backed by a memory mapped file: each setting sets K bits within a single
+# 64-byte block, so a lookup touches one cache line. The filter has a fixed size, and the fraction of untested candidates that are
+# wrongly skipped is the false positive rate of the filter. Hits (maximum period settings) are also stored exactly in a side table.
+# Settings are on the FPGA format.
+
+BLOCK_BYTES = 64
+BLOCK_BITS = BLOCK_BYTES * 8
+K = 8 # Number of bits set per setting
+DEFAULT_SIZE = 64 << 20 # 64 MiB, good for ~50 million settings at a false positive rate below 1%
+WORD_MASK = (1 << 64) - 1
+SEED = np.uint64(0x9E3779B97F4A7C15)
+
+# The splitmix64 finalizer, on an array of np.uint64 (wraps around on overflow)
+def mix64(x: np.ndarray) -> np.ndarray:
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class TestedIndex:
+    def __init__(self, index_dir: str, width: int, num_nlin: int, num_nlin_idx: int, size_bytes: int = DEFAULT_SIZE):
+        os.makedirs(index_dir, exist_ok=True)
+        name = f"{width}_{num_nlin}_{num_nlin_idx}"
+        self.setting_bytes = (width - 1 + num_nlin * num_nlin_idx * nlfsr_utils.get_idx_width(width) + 7) // 8
+        self.bloom_path = os.path.join(index_dir, f"tested_{name}_mix64.bloom")
+        self.hits_path = os.path.join(index_dir, f"hits_{name}.txt")
+        # An existing filter keeps its size, so size_bytes only matters when the filter is created
+        if not os.path.exists(self.bloom_path):
+            with open(self.bloom_path, "wb") as f:
+                f.truncate(size_bytes - size_bytes % BLOCK_BYTES)
+        self.file = open(self.bloom_path, "r+b")
+        self.bloom = mmap.mmap(self.file.fileno(), 0)
+        self.num_blocks = len(self.bloom) // BLOCK_BYTES
+        self.words = np.frombuffer(self.bloom, dtype=np.uint64)
+        self.setting_words = (self.setting_bytes + 7) // 8
+        self.hits = set()
+        if os.path.exists(self.hits_path):
+            with open(self.hits_path) as f:
+                self.hits = {int(line, 16) for line in f if line.strip()}
+
+    # Hash a batch of settings (a list of ints, or an array of np.uint64 if the settings fit in one word)
+    def _hash(self, settings) -> np.ndarray:
+        if isinstance(settings, np.ndarray) and self.setting_words == 1:
+            return mix64(settings.astype(np.uint64) ^ SEED)
+        h = np.full(len(settings), SEED, dtype=np.uint64)
+        for j in range(self.setting_words):
+            word = np.fromiter(((s >> (64 * j)) & WORD_MASK for s in settings), dtype=np.uint64, count=len(settings))
+            h = mix64(h ^ word)
+        return h
+
+    # Word indices into the filter and bit masks of the K bits for each setting, as two arrays of shape (len(settings), K).
+    # All K bits are in the block picked by the hash, at positions given by double hashing
+    def _positions(self, settings) -> tuple[np.ndarray, np.ndarray]:
+        h = self._hash(settings)
+        block = h % np.uint64(self.num_blocks)
+        h1 = mix64(h ^ SEED)
+        h2 = mix64(h1) | np.uint64(1)
+        p = (h1[:, None] + np.arange(K, dtype=np.uint64) * h2[:, None]) % np.uint64(BLOCK_BITS)
+        idx = block[:, None] * np.uint64(BLOCK_BYTES // 8) + (p >> np.uint64(6))
+        return idx.astype(np.intp), np.uint64(1) << (p & np.uint64(63))
+
+    def contains(self, setting: int) -> bool:
+        return len(self.filter_untested([setting])) == 0
+
+    # Bulk check before dispatch. Returns the settings that have (probably) not been tested
+    def filter_untested(self, settings) -> list:
+        if len(settings) == 0:
+            return []
+        idx, bits = self._positions(settings)
+        tested = np.all((self.words[idx] & bits) != 0, axis=1)
+        if isinstance(settings, np.ndarray):
+            untested = settings[~tested].tolist()
+        else:
+            untested = [s for s, t in zip(settings, tested.tolist()) if not t]
+        return [s for s in untested if s not in self.hits] if len(self.hits) > 0 else untested
+
+    def add_tested(self, settings):
+        if len(settings) == 0:
+            return
+        idx, bits = self._positions(settings)
+        np.bitwise_or.at(self.words, idx.ravel(), bits.ravel())
+
+    def add_hit(self, setting: int):
+        self.add_tested([setting])
+        if setting not in self.hits:
+            self.hits.add(setting)
+            with open(self.hits_path, "a") as f:
+                f.write(f"{setting:x}\n")
+
+    def flush(self):
+        self.bloom.flush()
+
+    def close(self):
+        self.bloom.flush()
+        del self.words # The array must be released before the map can be closed
+        self.bloom.close()
+        self.file.close()
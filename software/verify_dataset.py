@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import nlfsr_utils
+import dp_verify
+import period_backends
+
+# Re-verify every NLFSR in the dataset, e.g. after changes to the tooling.
+# All (n, form, function) triples are streamed into a process pool. Verdicts are cached on disk, keyed by the canonical
+# (smallest lexicographic) form of the function and a hash of the tool sources, so later runs only check new or changed entries.
+# Usage: python verify_dataset.py [--dataset <file>] [--cache <file>] [--processes <p>] [--n <n> ...]
+
+SOFTWARE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", "nlfsr_dataset.json")
+CACHE_FILE = os.path.join(SOFTWARE_DIR, "..", "dataset", ".verify_cache.json")
+TOOL_FILES = ["nlfsr_utils.py", "nlfsr_codegen.py", "dp_verify.py", "primitive_polys.py", "period_backends.py", "verify_dataset.py"]
+SMALL_N_LIMIT = 25 # Widths below this are tested one function per worker in the pool, wider ones with the distinguished point verifier
+SAVE_INTERVAL = 1000 # Save the cache after this many new verdicts
+
+# The tool version is a hash of the sources of the tools, so any change to them invalidates the cache
+def get_tool_version() -> str:
+    h = hashlib.sha256()
+    for f in TOOL_FILES:
+        with open(os.path.join(SOFTWARE_DIR, f), "rb") as src:
+            h.update(src.read())
+    return h.hexdigest()[:16]
+
+def get_cache_key(N: int, lst: list) -> str:
+    return f"{N}:{json.dumps(nlfsr_utils.get_smallest_lex(N, lst))}"
+
+def load_cache(path: str, tool_version: str) -> dict:
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        cache = json.load(f)
+    if cache.get("tool_version") != tool_version:
+        return {}
+    return cache["verdicts"]
+
+def save_cache(path: str, tool_version: str, verdicts: dict):
+    if path is None:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"tool_version": tool_version, "verdicts": verdicts}, f)
+    os.replace(tmp, path)
+
+# Returns a list of (n, form, nlfsr_count, number of functions) for the sections where the count is wrong
+def check_counts(dataset: dict) -> list:
+    mismatches = []
+    for n in dataset:
+        for form in dataset[n]:
+            count, num_functions = dataset[n][form]["nlfsr_count"], len(dataset[n][form]["functions"])
+            if count != num_functions:
+                mismatches.append((n, form, count, num_functions))
+    return mismatches
+
+# Pool worker, returns (key, verdict)
+def verify_small(task: tuple) -> tuple:
+    key, N, lst, is_max_period = task
+    lin, nlins = nlfsr_utils.format_list2vec(lst)
+    return key, is_max_period(N, lin, nlins)
+
+def verify_dataset(dataset: dict, verdicts: dict, processes: int = None, on_verdict=None) -> dict:
+    small, wide = [], []
+    for n in dataset:
+        for form in dataset[n]:
+            for f in dataset[n][form]["functions"]:
+                key = get_cache_key(int(n), f)
+                if key in verdicts:
+                    continue
+                (small if int(n) < SMALL_N_LIMIT else wide).append((key, int(n), f))
+
+    # The backend for each small width is picked here, so the workers don't calibrate, and the workers get its function rather
+    # than its name. Backends that use all cores for one function are left out, since the pool already does
+    backends = {}
+    for N in {N for _, N, _ in small}:
+        lin, nlins = period_backends.get_calibration_function(N, True)
+        name = period_backends.get_ranking(N, [(lin, nlins)] * (processes or os.cpu_count()), allow_parallel=False)[0]
+        backends[N] = period_backends.BACKENDS[name].is_max_period
+    small = [(key, N, f, backends[N]) for key, N, f in small]
+    with multiprocessing.Pool(processes or os.cpu_count()) as pool:
+        for key, verdict in pool.imap_unordered(verify_small, small, chunksize=16):
+            verdicts[key] = verdict
+            if on_verdict is not None:
+                on_verdict(key, verdict)
+    # The distinguished point verifier uses all cores for a single function, so the wide functions are done one at a time
+    for key, N, f in wide:
+        lin, nlins = nlfsr_utils.format_list2vec(f)
+        verdicts[key] = dp_verify.is_max_period(N, lin, nlins, processes=processes)
+        if on_verdict is not None:
+            on_verdict(key, verdicts[key])
+    return verdicts
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-verify the NLFSRs in the dataset")
+    parser.add_argument("--dataset", default=DATASET_FILE, help="Path to the dataset")
+    parser.add_argument("--cache", default=CACHE_FILE, help="Path to the verdict cache")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't update the verdict cache")
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes (defaults to the number of cores)")
+    parser.add_argument("--n", nargs="+", default=None, help="Only verify these widths")
+    args = parser.parse_args()
+
+    with open(args.dataset) as f:
+        dataset = json.load(f)
+    if args.n is not None:
+        dataset = {n: dataset[n] for n in args.n}
+    cache_path = None if args.no_cache else args.cache
+    tool_version = get_tool_version()
+    verdicts = load_cache(cache_path, tool_version)
+    num_cached = len(verdicts)
+
+    num_new = 0
+    def on_verdict(key, verdict):
+        nonlocal num_new
+        num_new += 1
+        if num_new % SAVE_INTERVAL == 0:
+            save_cache(cache_path, tool_version, verdicts)
+            print(f"Verified {num_new} functions")
+    verify_dataset(dataset, verdicts, args.processes, on_verdict)
+    save_cache(cache_path, tool_version, verdicts)
+    print(f"Verified {num_new} functions, {num_cached} verdicts were cached")
+
+    ok = True
+    for n, form, count, num_functions in check_counts(dataset):
+        print(f"n={n}, form={form}: nlfsr_count is {count}, but there are {num_functions} functions")
+        ok = False
+    for n in dataset:
+        for form in dataset[n]:
+            for f in dataset[n][form]["functions"]:
+                if not verdicts[get_cache_key(int(n), f)]:
+                    print(f"n={n}, form={form}: {nlfsr_utils.format_list2tex(f)} does not have maximum period")
+                    ok = False
+    if ok:
+        print("All functions have maximum period")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())